@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замеры производительности lab_3 на синтетических данных
+
+Для каждого размера таблицы employees (от 10 тыс. до 10 млн строк) строится
+детерминированная база, после чего замеряются:
+
+- sql - все запросы интерфейса напрямую через SQLite (те же SQL и функции, что
+  в main.py): вывод таблицы, статистика, фильтры, отчеты, графики, добавление
+  и удаление;
+- ui - те же действия через обработчики главного окна (QT_QPA_PLATFORM=offscreen)
+  от нажатия до заполнения виджета, с разбивкой по этапам из журнала запросов.
+
+Результаты пишутся в JSON с постоянным порядком записей, поэтому файлы разных
+версий можно сравнивать diff'ом или параметром --compare:
+
+    python benchmark.py --rows 10000 100000 --output bench.json
+    python benchmark.py --rows 10000 --output new.json --compare bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import platform
+import statistics
+import subprocess
+from itertools import islice
+
+# Окно строится без дисплея; переменную нужно задать до загрузки Qt
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer, QEventLoop, QT_VERSION_STR
+
+import main
+
+
+# Размеры таблицы по умолчанию и допустимый диапазон
+DEFAULT_ROWS = (10000, 100000)
+MIN_ROWS = 10000
+MAX_ROWS = 10000000
+
+# Начальное значение генератора: одинаковые данные при каждом запуске
+DEFAULT_SEED = 20240101
+
+# Строк в одной транзакции при заполнении базы
+BUILD_BATCH_SIZE = 50000
+
+# Выше этого размера замеры окна пропускаются: таблицы вкладок держат
+# весь результат в памяти
+DEFAULT_UI_MAX_ROWS = 1000000
+
+# Предельное время ожидания одного действия в окне (с)
+UI_TIMEOUT = 600
+
+# Изменение медианы (%), которое --compare отмечает как регрессию, и наименьшая
+# разница в мс: колебания субмиллисекундных замеров регрессией не считаются
+DEFAULT_THRESHOLD = 10.0
+MIN_REGRESSION_MS = 1.0
+
+LAST_NAMES = ("Иванов", "Петров", "Сидоров", "Козлов", "Новиков", "Морозов", "Волков",
+              "Лебедев", "Соколов", "Зайцев", "Попов", "Кузнецов", "Смирнов", "Федоров",
+              "Михайлов", "Орлов", "Павлов", "Семенов", "Егоров", "Никитин")
+FIRST_NAMES = ("Иван", "Петр", "Анна", "Дмитрий", "Елена", "Алексей", "Ольга", "Игорь",
+               "Максим", "Татьяна", "Сергей", "Мария", "Андрей", "Наталья", "Павел",
+               "Светлана", "Николай", "Ирина", "Виктор", "Юлия")
+DEPARTMENTS = ("IT", "Sales", "Marketing", "HR", "Finance", "Legal", "Support",
+               "Logistics", "R&D", "Operations")
+POSITIONS = ("Разработчик", "Менеджер", "Аналитик", "Дизайнер", "HR-менеджер", "Бухгалтер",
+             "Тестировщик", "Маркетолог", "Юрист", "Инженер", "Специалист", "Руководитель")
+
+# Условия фильтров: (имя, отдел, минимальная зарплата) в виде текста полей вкладки
+FILTER_CASES = (
+    ("filter_name", ("Иванов", "", "")),
+    ("filter_department", ("", "Sales", "")),
+    ("filter_salary", ("", "", "150000")),
+    ("filter_combined", ("ова", "IT", "80000")),
+)
+
+# Новый сотрудник для замеров добавления и удаления
+BENCHMARK_EMPLOYEE = ("Тестов Тест", "Тестировщик", "IT", 50000.0, "2024-01-01")
+
+
+def generate_employees(count, seed=DEFAULT_SEED):
+    """Детерминированные строки employees (name, position, department, salary, hire_date)"""
+    rng = random.Random(seed)
+    first_day = datetime.date(2010, 1, 1).toordinal()
+    days = datetime.date(2025, 1, 1).toordinal() - first_day
+    for _ in range(count):
+        # Логнормальное распределение зарплат: медиана около 73 тыс., длинный хвост
+        salary = round(rng.lognormvariate(11.2, 0.35) / 100) * 100.0
+        yield (f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}",
+               rng.choice(POSITIONS),
+               rng.choice(DEPARTMENTS),
+               salary,
+               datetime.date.fromordinal(first_day + rng.randrange(days)).isoformat())
+
+
+def database_path(data_dir, rows, seed):
+    return os.path.join(data_dir, f"employees_{rows}_{seed}.db")
+
+
+def count_employees(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def build_database(path, rows, seed=DEFAULT_SEED):
+    """Создать базу приложения (схема и миграции main.py) и заполнить ее rows строками"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    main.DB_PATH = path
+    if not main.DatabaseManager.init_database():
+        raise RuntimeError(f"не удалось создать базу {path}")
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        # Тестовые строки init_database заменяются сгенерированными, id - с единицы
+        conn.execute("DELETE FROM employees")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'employees'")
+        conn.commit()
+
+        employees = generate_employees(rows, seed)
+        inserted = 0
+        while True:
+            batch = list(islice(employees, BUILD_BATCH_SIZE))
+            if not batch:
+                break
+            conn.executemany(main.INSERT_EMPLOYEE_SQL, batch)
+            conn.commit()
+            inserted += len(batch)
+            print(f"  заполнение: {inserted}/{rows}", end="\r", flush=True)
+
+        main.rebuild_department_stats(conn)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    print(f"  база {path}: {rows} строк за {time.perf_counter() - started:.1f} с")
+
+
+def prepare_database(data_dir, rows, seed, rebuild=False):
+    """Путь к базе нужного размера; готовая база того же размера используется повторно"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = database_path(data_dir, rows, seed)
+    if rebuild or not os.path.exists(path) or count_employees(path) != rows:
+        build_database(path, rows, seed)
+    main.DB_PATH = path
+    return path
+
+
+def summarize(group, case, times, result_rows):
+    """Запись результата: время в мс (минимум, медиана, максимум) и размер результата"""
+    return {
+        'group': group,
+        'case': case,
+        'runs': len(times),
+        'min_ms': round(min(times) * 1000, 3),
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'max_ms': round(max(times) * 1000, 3),
+        'result_rows': result_rows,
+    }
+
+
+def fetch_count(conn, query, params=()):
+    """Выполнить запрос и выбрать результат порциями, как потоковые вкладки"""
+    cursor = conn.execute(query, params)
+    total = 0
+    while True:
+        rows = cursor.fetchmany(main.STREAM_CHUNK_SIZE)
+        if not rows:
+            return total
+        total += len(rows)
+
+
+def sql_cases(fts_mode):
+    """Запросы интерфейса: (название, функция conn -> число строк результата)"""
+    order = main.order_by_clause("id")
+    cases = [
+        ("query1_all", lambda conn: fetch_count(conn, "SELECT * FROM employees" + order)),
+        ("query1_column", lambda conn: fetch_count(conn, "SELECT id, name FROM employees" + order)),
+        ("query2_department_stats", lambda conn: fetch_count(conn, main.DEPARTMENT_STATS_QUERY)),
+        ("query3_high_salary", lambda conn: fetch_count(conn, main.HIGH_SALARY_QUERY)),
+    ]
+    for name, (name_filter, dept_filter, min_salary) in FILTER_CASES:
+        query, params = main.build_filter_query(name_filter, dept_filter, min_salary, fts_mode)
+        cases.append((name, lambda conn, query=query, params=params: fetch_count(conn, query, params)))
+    cases += [
+        ("report_departments", lambda conn: fetch_count(conn, main.DEPARTMENT_REPORT_QUERY)),
+        ("report_salaries", lambda conn: fetch_count(conn, main.SALARY_REPORT_QUERY)),
+        ("report_distribution", lambda conn: main.salary_distribution(conn)['total']),
+        ("chart_salary", lambda conn: fetch_count(conn, main.SALARY_CHART_QUERY)),
+        ("chart_pie", lambda conn: fetch_count(conn, main.PIE_CHART_QUERY)),
+        ("chart_hire", lambda conn: fetch_count(conn, main.HIRE_CHART_QUERY)),
+    ]
+    return cases
+
+
+def run_sql_cases(path, repeat, warmup):
+    """Замеры запросов напрямую через подключение с настройками пула приложения"""
+    conn = sqlite3.connect(path)
+    for pragma in main.ConnectionPool.PRAGMAS:
+        conn.execute(pragma)
+    results = []
+    try:
+        for case, run in sql_cases(main.DatabaseManager.fts_mode(path)):
+            for _ in range(warmup):
+                run(conn)
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result_rows = run(conn)
+                times.append(time.perf_counter() - started)
+            results.append(summarize('sql', case, times, result_rows))
+
+        # Запись: добавление и удаление одного сотрудника (триггеры статистики и FTS)
+        add_times, delete_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with conn:
+                employee_id = conn.execute(main.INSERT_EMPLOYEE_SQL, BENCHMARK_EMPLOYEE).lastrowid
+            add_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            with conn:
+                conn.execute("DELETE FROM employees WHERE id = ?", [employee_id])
+            delete_times.append(time.perf_counter() - started)
+        results.append(summarize('sql', 'add_employee', add_times, 1))
+        results.append(summarize('sql', 'delete_employee', delete_times, 1))
+    finally:
+        conn.close()
+    return results
+
+
+class WindowBench:
+    """Замеры действий главного окна от вызова обработчика до заполнения виджетов
+
+    Действие считается завершенным, когда не осталось активных задач пула и
+    задач отрисовки графиков: задача покидает active_workers только после
+    всех обработчиков результата.
+    """
+
+    def __init__(self, pool_size):
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        # Диалоги подтверждения и сообщения не должны ждать пользователя
+        main.QMessageBox.question = staticmethod(lambda *args, **kwargs: main.QMessageBox.Yes)
+        for name in ("information", "warning", "critical"):
+            setattr(main.QMessageBox, name, staticmethod(self.report_message))
+
+        self.window = main.MainWindow(pool_size=pool_size)
+        self.window.query_log.path = None
+        self.window.resize(1200, 800)
+        self.window.show()
+        self.errors = []
+        self.wait_idle()
+
+    def report_message(self, parent, title, text, *args, **kwargs):
+        if title.startswith("Ошибка"):
+            self.errors.append(text)
+        return main.QMessageBox.Ok
+
+    def last_employee_id(self):
+        conn = sqlite3.connect(main.DB_PATH)
+        try:
+            return conn.execute("SELECT MAX(id) FROM employees").fetchone()[0]
+        finally:
+            conn.close()
+
+    def close(self):
+        self.window.db_writer.stop()
+        self.window.db_pool.close()
+        self.window.hide()
+        self.window.deleteLater()
+
+    def wait_idle(self):
+        """Обрабатывать события, пока окно не закончит все запросы и графики"""
+        window = self.window
+        deadline = time.perf_counter() + UI_TIMEOUT
+        # Таймер не дает циклу уснуть, если событий больше не будет
+        timer = QTimer()
+        timer.start(20)
+        try:
+            while window.active_workers or window.chart_jobs:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError("окно не завершило действие за отведенное время")
+                self.app.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents)
+            self.app.processEvents()
+        finally:
+            timer.stop()
+
+    def measure(self, case, action, repeat, warmup, prepare=None):
+        """Замер действия; строки и разбивка по этапам берутся из журнала запросов"""
+        window = self.window
+        times = []
+        phases = {phase: [] for phase in main.QueryTiming.PHASES}
+        for run in range(warmup + repeat):
+            # Каждый прогон идет в базу: кэш результатов и изображений сбрасывается
+            window.query_cache.invalidate()
+            window.chart_images.clear()
+            if prepare is not None:
+                prepare()
+            window.query_log.clear()
+            started = time.perf_counter()
+            action()
+            self.wait_idle()
+            elapsed = time.perf_counter() - started
+            if run < warmup:
+                continue
+            times.append(elapsed)
+            timings = window.query_log.entries()
+            result_rows = sum(timing.rows for timing in timings)
+            for phase in phases:
+                phases[phase].append(sum(getattr(timing, phase) for timing in timings))
+
+        if self.errors:
+            raise RuntimeError(f"{case}: {self.errors[-1]}")
+        record = summarize('ui', case, times, result_rows)
+        for phase, values in phases.items():
+            record[f'{phase}_ms'] = round(statistics.median(values) * 1000, 3)
+        return record
+
+    def run_cases(self, repeat, warmup):
+        window = self.window
+        for tab in (window.tab2, window.tab3, window.tab5):
+            window.ensure_tab(tab)
+        results = []
+
+        def select_column(column):
+            window.paged_check.setChecked(False)
+            window.combo_columns.setCurrentText(column)
+
+        results.append(self.measure("query1_all", window.execute_query1, repeat, warmup,
+                                    prepare=lambda: select_column("Все поля")))
+        results.append(self.measure("query1_column", window.execute_query1, repeat, warmup,
+                                    prepare=lambda: select_column("Имя")))
+        results.append(self.measure("query2_department_stats", window.execute_query2, repeat, warmup))
+        results.append(self.measure("query3_high_salary", window.execute_query3, repeat, warmup))
+
+        for case, texts in FILTER_CASES:
+            def set_filters(texts=texts):
+                for edit, text in zip((window.name_filter, window.dept_filter, window.min_salary), texts):
+                    edit.setPlainText(text)
+                # Запуск по таймеру ввода не нужен - фильтр применяется замеряемым вызовом
+                window.filter_timer.stop()
+            results.append(self.measure(case, window.apply_filters, repeat, warmup,
+                                        prepare=set_filters))
+
+        for case, action in (("report_departments", window.generate_department_report),
+                             ("report_salaries", window.generate_salary_report),
+                             ("report_distribution", window.generate_distribution_report)):
+            results.append(self.measure(case, action, repeat, warmup))
+
+        window.ensure_tab(window.tab4)
+        if main.MATPLOTLIB_AVAILABLE:
+            for case, action in (("chart_salary", window.show_salary_chart),
+                                 ("chart_pie", window.show_department_pie_chart),
+                                 ("chart_hire", window.show_hire_chart)):
+                results.append(self.measure(case, action, repeat, warmup))
+        else:
+            print("  matplotlib не установлен - замеры графиков пропущены")
+
+        # Вкладка редактирования при построении загружает всю таблицу
+        def load_edit_table():
+            if window.is_tab_built(window.tab6):
+                window.refresh_edit_table()
+            else:
+                window.ensure_tab(window.tab6)
+        results.append(self.measure("edit_table_load", load_edit_table, repeat, warmup))
+
+        def fill_form():
+            for edit, value in zip((window.edit_name, window.edit_position, window.edit_department,
+                                    window.edit_salary, window.edit_hire_date), BENCHMARK_EMPLOYEE):
+                edit.setText(str(value))
+        results.append(self.measure("add_employee", window.add_employee, repeat, warmup,
+                                    prepare=fill_form))
+
+        # Каждый прогон удаляет последнего добавленного сотрудника
+        pending = []
+        results.append(self.measure("delete_employee", lambda: window.delete_employee(pending.pop()),
+                                    repeat, warmup,
+                                    prepare=lambda: pending.append(self.last_employee_id())))
+        return results
+
+
+def run_ui_cases(pool_size, repeat, warmup):
+    bench = WindowBench(pool_size)
+    try:
+        return bench.run_cases(repeat, warmup)
+    finally:
+        bench.close()
+
+
+def git_revision():
+    """Текущая ревизия репозитория (если доступна)"""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """Сравнение медиан с результатами прошлой версии; возвращает число регрессий"""
+    old = {(r['rows'], r['group'], r['case']): r for r in baseline['results']}
+    regressions = 0
+    print(f"\nСравнение с {baseline['meta'].get('revision') or 'базовыми результатами'}:")
+    print(f"{'строк':>9} {'группа':<4} {'замер':<26}{'было, мс':>12}{'стало, мс':>12}{'изм.':>9}")
+    for record in results:
+        previous = old.get((record['rows'], record['group'], record['case']))
+        if previous is None:
+            continue
+        before, after = previous['median_ms'], record['median_ms']
+        change = (after - before) / before * 100 if before else 0.0
+        mark = ""
+        if change > threshold and after - before >= MIN_REGRESSION_MS:
+            regressions += 1
+            mark = "  регрессия"
+        print(f"{record['rows']:>9} {record['group']:<4} {record['case']:<26}"
+              f"{before:>12.2f}{after:>12.2f}{change:>+8.1f}%{mark}")
+    return regressions
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Замеры производительности lab_3 на синтетических данных")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS),
+                        help=f"размеры таблицы employees ({MIN_ROWS}..{MAX_ROWS})")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="начальное значение генератора")
+    parser.add_argument('--repeat', type=int, default=5, help="число замеряемых прогонов")
+    parser.add_argument('--warmup', type=int, default=1, help="число прогонов без замера")
+    parser.add_argument('--data-dir', default='bench_data', help="каталог сгенерированных баз")
+    parser.add_argument('--rebuild', action='store_true', help="заново создать базы")
+    parser.add_argument('--pool-size', type=int, default=main.DEFAULT_POOL_SIZE,
+                        help="размер пула подключений окна")
+    parser.add_argument('--no-ui', action='store_true', help="только запросы к базе, без окна")
+    parser.add_argument('--ui-max-rows', type=int, default=DEFAULT_UI_MAX_ROWS,
+                        help="наибольший размер таблицы для замеров окна")
+    parser.add_argument('--output', default='benchmark_results.json', help="файл результатов (JSON)")
+    parser.add_argument('--compare', help="результаты прошлой версии для сравнения")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="рост медианы в процентах, считающийся регрессией")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        if not MIN_ROWS <= rows <= MAX_ROWS:
+            parser.error(f"размер {rows} вне диапазона {MIN_ROWS}..{MAX_ROWS}")
+
+    meta = {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'qt': QT_VERSION_STR,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'pool_size': args.pool_size,
+    }
+    results = []
+    for rows in sorted(set(args.rows)):
+        print(f"Размер таблицы: {rows}")
+        path = prepare_database(args.data_dir, rows, args.seed, args.rebuild)
+        groups = [run_sql_cases(path, args.repeat, args.warmup)]
+        if not args.no_ui and rows <= args.ui_max_rows:
+            groups.append(run_ui_cases(args.pool_size, args.repeat, args.warmup))
+        for group in groups:
+            for record in group:
+                record['rows'] = rows
+                results.append(record)
+                print(f"  {record['group']:<4} {record['case']:<26}{record['median_ms']:>12.2f} мс"
+                      f"  (строк: {record['result_rows']})")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"Результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_results(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
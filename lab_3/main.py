@@ -2,72 +2,953 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import os
+import time
+
+# Момент начала загрузки модуля (отсчет для --profile-startup)
+STARTED_AT = time.perf_counter()
+
+import re
+import csv
+import io
+import json
+import importlib.util
+import queue
 import sqlite3
 import threading
+import datetime
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from array import array
+from collections import Counter, OrderedDict, deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QComboBox, QTabWidget, 
-                            QTableWidget, QTableWidgetItem, QMenuBar, QMenu, 
+                            QTableView, QMenuBar, QMenu, 
                             QAction, QMessageBox, QStatusBar, QLabel, QHeaderView,
                             QSplitter, QTextEdit, QGroupBox, QGridLayout, QLineEdit,
-                            QInputDialog, QFormLayout, QSpinBox, QDateEdit)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont, QIcon
-
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-    from matplotlib.figure import Figure
-    import matplotlib
-    matplotlib.use('Qt5Agg')
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
-
-
-class DatabaseWorker(QThread):
-    """Рабочий поток для выполнения SQL запросов"""
-    finished = pyqtSignal(list)
+                            QInputDialog, QFormLayout, QSpinBox, QDateEdit, QCheckBox,
+                            QProgressBar, QFileDialog, QStyledItemDelegate,
+                            QStyleOptionButton, QStyle, QSizePolicy, QDialog)
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QTimer, QObject, QRunnable, QThreadPool,
+                          QAbstractTableModel, QModelIndex, QEvent)
+from PyQt5.QtGui import QFont, QIcon, QImage, QPixmap
+
+# matplotlib импортируется при первом открытии вкладки графиков (load_matplotlib):
+# его загрузка - самая долгая часть запуска, а графики нужны не всегда
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec("matplotlib") is not None
+
+# NumPy нужен только снимку в памяти и импортируется при его включении (load_numpy)
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+
+
+# Путь к базе данных и размер пула подключений по умолчанию
+DB_PATH = 'database.db'
+DEFAULT_POOL_SIZE = 4
+
+# Размер порции строк при потоковом чтении результата
+STREAM_CHUNK_SIZE = 2000
+
+# Размер страницы при постраничном просмотре по умолчанию
+DEFAULT_PAGE_SIZE = 500
+
+# Ограничение объема кэша результатов запросов
+QUERY_CACHE_BUDGET = 32 * 1024 * 1024
+
+# Задержка перед запуском фильтра при вводе (мс)
+FILTER_DEBOUNCE_MS = 300
+
+# Количество строк в одной транзакции при импорте из CSV
+IMPORT_BATCH_SIZE = 10000
+
+# Окно группировки операций записи в одну транзакцию (мс) и предел пакета
+WRITE_FLUSH_MS = 20
+WRITE_MAX_BATCH = 500
+
+# Строк детальной части отчета на одной странице
+REPORT_PAGE_SIZE = 200
+
+# Количество готовых изображений графиков в кэше
+CHART_CACHE_SIZE = 16
+
+# Журнал замеров: число последних запросов, порог медленного запроса (мс)
+# и файл, в который медленные запросы дописываются строками JSON
+QUERY_LOG_SIZE = 500
+SLOW_QUERY_MS = 200
+SLOW_QUERY_LOG_PATH = 'slow_queries.jsonl'
+
+
+class WorkerSignals(QObject):
+    """Сигналы рабочей задачи (QRunnable не является QObject)
+
+    Результаты передаются как object - по ссылке, без преобразования в
+    QVariantList: ResultSet для чтения, список для записи и составных операций.
+    """
+    finished = pyqtSignal(object)
     error = pyqtSignal(str)
-    
-    def __init__(self, query, params=None, is_write_operation=False):
+    chunk = pyqtSignal(object)  # Очередная порция строк - ResultSet (потоковый режим)
+    done = pyqtSignal(int)  # Общее число строк (потоковый режим)
+    # Последний сигнал задачи: испускается после finished/done/error, поэтому его
+    # вызов в очереди GUI идет после вызовов всех подключенных к ним слотов
+    released = pyqtSignal()
+
+
+class ConnectionPool:
+    """Пул потоков фиксированного размера с долгоживущими подключениями к SQLite"""
+
+    # Настройки, применяемые к каждому новому подключению
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, db_path=DB_PATH, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(self.size)
+        # Потоки не завершаются по таймауту, поэтому их подключения живут до закрытия пула
+        self.thread_pool.setExpiryTimeout(-1)
+
+        self._lock = threading.Lock()
+        # Подключения по идентификатору потока: threading.local не переживает
+        # возврат потока Qt в пул, поэтому используется обычный словарь
+        self._connections = {}
+
+        # Счетчики для статистики
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_time = 0.0
+
+    def connection(self):
+        """Подключение текущего потока пула (создается при первом обращении)"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            conn = self._connections.get(thread_id)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            with self._lock:
+                self._connections[thread_id] = conn
+        return conn
+
+    def submit(self, worker):
+        """Поставить задачу в очередь пула"""
+        with self._lock:
+            self.submitted += 1
+        self.thread_pool.start(worker)
+
+    def record(self, success, elapsed):
+        """Учесть завершение задачи"""
+        with self._lock:
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.total_time += elapsed
+
+    def stats(self):
+        """Текущая статистика пула"""
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                'size': self.size,
+                'active': self.thread_pool.activeThreadCount(),
+                'connections': len(self._connections),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'pending': self.submitted - done,
+                'avg_ms': self.total_time / done * 1000 if done else 0.0,
+            }
+
+    def close(self, timeout_ms=1000):
+        """Дождаться завершения задач и закрыть все подключения
+
+        Если задачи не завершились за timeout_ms, подключения остаются открытыми:
+        ими еще пользуются потоки пула. Возвращает True, если пул закрыт.
+        """
+        if not self.thread_pool.waitForDone(timeout_ms):
+            print("Пул подключений: задачи не завершились, подключения не закрыты")
+            return False
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        return True
+
+
+def estimate_size(rows):
+    """Приблизительный объем результата запроса в байтах"""
+    if isinstance(rows, ResultSet):
+        return rows.nbytes()
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+def sample_size(rows, sample=100):
+    """Оценка объема результата по первым строкам - для замеров больших выборок"""
+    if isinstance(rows, ResultSet) or len(rows) <= sample:
+        return estimate_size(rows)
+    return estimate_size(rows[:sample]) * len(rows) // sample
+
+
+class QueryCache:
+    """LRU-кэш результатов запросов по ключу (SQL, параметры) с ограничением объема
+
+    Любая запись через приложение увеличивает поколение и очищает кэш. Запись
+    другими подключениями обнаруживается по изменению PRAGMA data_version.
+    """
+
+    def __init__(self, budget_bytes=QUERY_CACHE_BUDGET):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Последнее значение data_version для каждого подключения
+        self._data_versions = {}
+        self.generation = 0
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Результат из кэша или None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, rows, generation):
+        """Сохранить результат, если данные не менялись с начала запроса"""
+        size = estimate_size(rows)
+        with self._lock:
+            if generation != self.generation or size > self.budget_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[1]
+            self._entries[key] = (rows, size)
+            self.size_bytes += size
+            # Вытеснение давно не использованных результатов
+            while self.size_bytes > self.budget_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+
+    def invalidate(self):
+        """Сбросить кэш после изменения данных"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def check_data_version(self, conn):
+        """Сбросить кэш, если данные изменены через другое подключение
+
+        Первая проверка подключения и любое изменение data_version сбрасывают
+        кэш, даже если запись сделана приложением и кэш уже сброшен: лишняя
+        очистка дешевле риска отдать результат, устаревший после записи
+        внешнего подключения (значения data_version разных подключений
+        между собой не сравнимы).
+        """
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            last = self._data_versions.get(id(conn))
+            self._data_versions[id(conn)] = version
+        if last != version:
+            self.invalidate()
+
+    def stats(self):
+        """Счетчики кэша"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'generation': self.generation,
+            }
+
+
+class QueryTiming:
+    """Замеры одного запроса: этапы в секундах, строки и объем результата
+
+    Этапы: ожидание в очереди, выполнение (execute), выборка строк (fetch),
+    доставка сигнала в поток GUI и заполнение интерфейса обработчиками.
+    Поля заполняются по ходу выполнения в потоке задачи и в потоке GUI.
+    """
+
+    PHASES = ('queue', 'execute', 'fetch', 'delivery', 'ui')
+
+    def __init__(self, query, params=(), kind='read', source=None):
+        # Для составных операций query(conn) сохраняется имя функции, плана у них нет
+        self.explainable = isinstance(query, str)
+        self.sql = query if self.explainable else getattr(query, '__name__', repr(query))
+        self.params = list(params)
+        self.kind = kind
+        self.source = source
+        self.timestamp = time.time()
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.emitted = None
+        self.delivered = None
+        self.chunk_started = None
+        self.queue = self.execute = self.fetch = self.delivery = self.ui = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.cached = False
+        self.error = None
+
+    def begin(self):
+        """Задача начала выполняться (поток задачи)"""
+        self.started = time.perf_counter()
+        self.queue = self.started - self.submitted
+
+    def emit(self):
+        """Результат отправляется в поток GUI (поток задачи)"""
+        self.emitted = time.perf_counter()
+
+    def deliver(self):
+        """Первый обработчик результата вызван (поток GUI)"""
+        if self.delivered is None and self.emitted is not None:
+            self.delivered = time.perf_counter()
+            self.delivery = self.delivered - self.emitted
+
+    def chunk_received(self):
+        """Обработчики порции строк начали выполняться (поток GUI)"""
+        self.chunk_started = time.perf_counter()
+
+    def chunk_handled(self):
+        """Обработчики порции строк выполнены: их время добавляется к заполнению интерфейса"""
+        if self.chunk_started is not None:
+            self.ui += time.perf_counter() - self.chunk_started
+            self.chunk_started = None
+
+    def complete(self):
+        """Все обработчики результата выполнены (поток GUI)"""
+        if self.delivered is not None:
+            self.ui += time.perf_counter() - self.delivered
+
+    def total(self):
+        """Полное время от постановки в очередь до заполнения интерфейса"""
+        return sum(getattr(self, phase) for phase in self.PHASES)
+
+    def as_dict(self):
+        """Запись для журнала медленных запросов"""
+        record = {
+            'time': datetime.datetime.fromtimestamp(self.timestamp).isoformat(timespec='milliseconds'),
+            'source': self.source,
+            'kind': self.kind,
+            'sql': self.sql,
+            'params': self.params,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'cached': self.cached,
+            'error': self.error,
+        }
+        for phase in self.PHASES:
+            record[f'{phase}_ms'] = round(getattr(self, phase) * 1000, 3)
+        record['total_ms'] = round(self.total() * 1000, 3)
+        return record
+
+
+class QueryLog:
+    """Кольцевой журнал замеров последних запросов и файл медленных запросов
+
+    Запрос дольше slow_ms дописывается строкой JSON в path (JSONL), если путь задан.
+    """
+
+    def __init__(self, size=QUERY_LOG_SIZE, slow_ms=SLOW_QUERY_MS, path=SLOW_QUERY_LOG_PATH):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.slow_ms = slow_ms
+        self.path = path
+        self.slow_count = 0
+
+    def add(self, timing):
+        """Добавить замеры завершенного запроса"""
+        with self._lock:
+            self._entries.append(timing)
+        if timing.total() * 1000 >= self.slow_ms:
+            self.slow_count += 1
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(timing.as_dict(), ensure_ascii=False, default=str) + "\n")
+                except OSError as e:
+                    print(f"Ошибка записи журнала медленных запросов: {e}")
+
+    def entries(self):
+        """Копия журнала, от старых запросов к новым"""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatabaseWorker(QRunnable):
+    """Задача пула для выполнения запроса чтения
+
+    Вместо SQL можно передать функцию query(conn), возвращающую список результата.
+    Запись выполняет поток DatabaseWriter (см. MainWindow.create_worker).
+    """
+
+    def __init__(self, query, params=None, pool=None, chunk_size=None, cache=None):
         super().__init__()
         self.query = query
         self.params = params or []
-        self.is_write_operation = is_write_operation
-        
+        self.pool = pool
+        # Если задан размер порции, результат отдается через chunk/done вместо finished
+        self.chunk_size = chunk_size
+        # Кэш результатов: чтение берется из кэша
+        self.cache = cache
+        # Отмена: флаг проверяется обработчиком прогресса SQLite и между порциями,
+        # а выполняющийся запрос прерывается через Connection.interrupt()
+        self.cancelled = False
+        self.conn = None
+        self._conn_lock = threading.Lock()
+        # Объект живет, пока на него ссылается MainWindow.active_workers
+        self.setAutoDelete(False)
+        self.timing = QueryTiming(query, self.params)
+
+        self.signals = WorkerSignals()
+        self.finished = self.signals.finished
+        self.error = self.signals.error
+        self.chunk = self.signals.chunk
+        self.done = self.signals.done
+
+    def start(self):
+        """Отправить задачу в пул подключений"""
+        if self.chunk_size:
+            # Подключается после обработчиков порций, поэтому вызывается последним
+            self.chunk.connect(lambda rows: self.timing.chunk_handled())
+        self.timing.submitted = time.perf_counter()
+        self.pool.submit(self)
+
+    def cancel(self):
+        """Отменить задачу (безопасно вызывать из потока GUI)"""
+        self.cancelled = True
+        with self._conn_lock:
+            # Подключение задано только пока задача им пользуется,
+            # поэтому прерывание не заденет следующий запрос этого потока
+            if self.conn is not None:
+                self.conn.interrupt()
+
     def run(self):
+        started = time.perf_counter()
+        timing = self.timing
+        timing.begin()
+        conn = None
         try:
-            # Подключение к базе данных SQLite
-            conn = sqlite3.connect('database.db')
-            cursor = conn.cursor()
-            
-            cursor.execute(self.query, self.params)
+            if self.cancelled:
+                raise sqlite3.OperationalError("interrupted")
             
-            if self.is_write_operation:
-                # Для операций записи (INSERT, UPDATE, DELETE)
-                conn.commit()
-                result = [cursor.rowcount]  # Возвращаем количество измененных строк
-                print(f"База данных: операция записи затронула {cursor.rowcount} записей")
+            # Долгоживущее подключение потока пула
+            conn = self.pool.connection()
+            with self._conn_lock:
+                self.conn = conn
+            conn.set_progress_handler(lambda: self.cancelled, 1000)
+            cursor = conn.cursor()
+
+            if callable(self.query):
+                # Составная операция над подключением
+                result = self.query(conn)
+                timing.execute = time.perf_counter() - timing.started
+                timing.rows = len(result)
+            elif self.cache is not None:
+                # Кэшируемое чтение
+                result = self.cached_fetchall(conn, cursor)
+                timing.rows = len(result)
+                timing.bytes = sample_size(result)
+            elif self.chunk_size:
+                # Потоковое чтение: порции отправляются по мере получения,
+                # повторяющиеся строки всех порций - общие объекты
+                self.timed_execute(cursor)
+                total = 0
+                shared = {}
+                fetch_started = time.perf_counter()
+                while not self.cancelled:
+                    rows = ResultSet.fetch(cursor, self.chunk_size, shared)
+                    if not rows:
+                        break
+                    total += len(rows)
+                    timing.bytes += rows.nbytes()
+                    self.chunk.emit(rows)
+                timing.fetch = time.perf_counter() - fetch_started
+                timing.rows = total
             else:
                 # Для операций чтения (SELECT)
-                result = cursor.fetchall()
+                self.timed_execute(cursor)
+                result = self.timed_fetchall(cursor)
+                timing.rows = len(result)
+                timing.bytes = sample_size(result)
+            cursor.close()
+
+            self.pool.record(True, time.perf_counter() - started)
+            timing.emit()
+            if self.chunk_size:
+                self.done.emit(total)
+            else:
+                self.finished.emit(result)
+
+        except Exception as e:
+            if not self.cancelled:
+                print(f"Ошибка базы данных: {e}")
+            self.pool.record(False, time.perf_counter() - started)
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            timing.error = str(e)
+            timing.emit()
+            self.error.emit(str(e))
+        
+        finally:
+            if conn is not None:
+                with self._conn_lock:
+                    self.conn = None
+                conn.set_progress_handler(None, 0)
+            self.signals.released.emit()
+
+    def timed_execute(self, cursor):
+        """cursor.execute с замером этапа выполнения"""
+        execute_started = time.perf_counter()
+        cursor.execute(self.query, self.params)
+        self.timing.execute = time.perf_counter() - execute_started
+
+    def timed_fetchall(self, cursor):
+        """Выборка всего результата в ResultSet с замером этапа выборки"""
+        fetch_started = time.perf_counter()
+        result = ResultSet.fetch(cursor)
+        self.timing.fetch = time.perf_counter() - fetch_started
+        return result
+
+    def cached_fetchall(self, conn, cursor):
+        """Результат запроса из кэша или из БД с сохранением в кэш"""
+        self.cache.check_data_version(conn)
+        key = (self.query, tuple(self.params))
+        result = self.cache.get(key)
+        if result is None:
+            generation = self.cache.generation
+            self.timed_execute(cursor)
+            result = self.timed_fetchall(cursor)
+            self.cache.put(key, result, generation)
+        else:
+            self.timing.cached = True
+        return result
+
+
+class WriteOperation:
+    """Операция записи, выполняемая потоком DatabaseWriter
+
+    Интерфейс совпадает с DatabaseWorker: сигналы finished/error и start().
+    Результат SQL операции - [rowcount, lastrowid], функции query(conn) - ее список.
+    Для ожидания из фоновых потоков результат дублируется в result/failure,
+    а по завершении устанавливается событие completed (см. DatabaseWriter.execute).
+    """
+
+    def __init__(self, writer, query, params=None):
+        self.writer = writer
+        self.query = query
+        self.params = params or []
+        self.timing = QueryTiming(query, self.params, 'write')
+        self.signals = WorkerSignals()
+        self.finished = self.signals.finished
+        self.error = self.signals.error
+        self.chunk = self.signals.chunk
+        self.done = self.signals.done
+        self.result = None
+        self.failure = None
+        self.completed = threading.Event()
+
+    def start(self):
+        """Поставить операцию в очередь записи"""
+        self.timing.submitted = time.perf_counter()
+        self.writer.enqueue(self)
+
+
+class DatabaseWriter(QThread):
+    """Единственный поток записи с групповой фиксацией
+
+    Операции из очереди, накопившиеся за окно WRITE_FLUSH_MS, выполняются в одной
+    транзакции (BEGIN IMMEDIATE ... COMMIT), каждая в своей точке сохранения,
+    поэтому ошибка одной операции не отменяет остальные. Читатели пула в режиме
+    WAL не блокируются записью.
+    """
+
+    def __init__(self, db_path=DB_PATH, cache=None, flush_ms=WRITE_FLUSH_MS, max_batch=WRITE_MAX_BATCH):
+        super().__init__()
+        self.db_path = db_path
+        self.cache = cache
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        
+        # Счетчики для статистики
+        self.operations = 0
+        self.failed = 0
+        self.transactions = 0
+
+    def operation(self, query, params=None):
+        """Создать операцию записи (запускается через start())"""
+        return WriteOperation(self, query, params)
+
+    def enqueue(self, operation):
+        self.queue.put(operation)
+
+    def execute(self, query, params=None):
+        """Выполнить операцию записи и дождаться результата
+
+        Для фоновых задач (импорт): запись идет через этот же поток, а не через
+        второе подключение-писатель. Ошибка операции поднимается исключением.
+        """
+        operation = self.operation(query, params)
+        operation.start()
+        while not operation.completed.wait(0.1):
+            if self.isFinished():
+                raise sqlite3.OperationalError("Поток записи остановлен")
+        if operation.failure is not None:
+            raise sqlite3.OperationalError(operation.failure)
+        return operation.result
+
+    def stop(self, timeout_ms=1000):
+        """Выполнить оставшиеся операции и завершить поток"""
+        self.queue.put(None)
+        self.wait(timeout_ms)
+
+    def stats(self):
+        """Текущая статистика записи"""
+        return {
+            'queued': self.queue.qsize(),
+            'operations': self.operations,
+            'failed': self.failed,
+            'transactions': self.transactions,
+        }
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        for pragma in ConnectionPool.PRAGMAS:
+            conn.execute(pragma)
+        
+        running = True
+        while running:
+            operation = self.queue.get()
+            if operation is None:
+                break
             
-            conn.close()
-            self.finished.emit(result)
+            # Собираем операции, пришедшие за окно группировки
+            batch = [operation]
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(batch) < self.max_batch:
+                try:
+                    operation = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if operation is None:
+                    running = False
+                    break
+                batch.append(operation)
             
+            self.flush(conn, batch)
+        
+        conn.close()
+
+    def apply(self, conn, operation):
+        operation.timing.begin()
+        if callable(operation.query):
+            result = operation.query(conn)
+            operation.timing.rows = len(result)
+        else:
+            cursor = conn.execute(operation.query, operation.params)
+            print(f"База данных: операция записи затронула {cursor.rowcount} записей")
+            result = [cursor.rowcount, cursor.lastrowid]
+            operation.timing.rows = cursor.rowcount
+        operation.timing.execute = time.perf_counter() - operation.timing.started
+        return result
+
+    def flush(self, conn, batch):
+        """Выполнить пакет операций в одной транзакции и сообщить результаты"""
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if len(batch) == 1:
+                # Одиночной операции точка сохранения не нужна: ее ошибка откатывает
+                # всю транзакцию ниже. Крупные executemany (пакеты импорта) внутри
+                # SAVEPOINT заметно замедляются по мере роста таблицы и индекса FTS
+                results.append((batch[0], self.apply(conn, batch[0]), None))
+            else:
+                for operation in batch:
+                    conn.execute("SAVEPOINT operation")
+                    try:
+                        result = self.apply(conn, operation)
+                        conn.execute("RELEASE operation")
+                        results.append((operation, result, None))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO operation")
+                        conn.execute("RELEASE operation")
+                        results.append((operation, None, str(e)))
+            conn.execute("COMMIT")
         except Exception as e:
-            print(f"Ошибка базы данных: {e}")
-            self.error.emit(str(e))
+            # Транзакция не зафиксирована - ошибка для всех операций пакета
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(operation, None, str(e)) for operation in batch]
+        
+        self.transactions += 1
+        self.operations += len(batch)
+        if self.cache is not None and any(error is None for _, _, error in results):
+            self.cache.invalidate()
+        
+        for operation, result, error in results:
+            if operation.timing.started is None:
+                operation.timing.begin()
+            operation.timing.error = error
+            operation.timing.emit()
+            operation.result, operation.failure = result, error
+            if error is None:
+                operation.finished.emit(result)
+            else:
+                print(f"Ошибка базы данных: {error}")
+                self.failed += 1
+                operation.error.emit(error)
+            operation.signals.released.emit()
+            operation.completed.set()
+
+
+def create_employees_fts(conn):
+    """Создание полнотекстового индекса employees_fts (FTS5) с триггерами синхронизации
+
+    Предпочтительно используется токенизатор trigram (поиск подстроки), при его
+    отсутствии - unicode61 с префиксными индексами. Если FTS5 не собран в SQLite,
+    индекс не создается и фильтры работают через LIKE.
+    """
+    for options in ("tokenize='trigram'", "tokenize='unicode61', prefix='2 3'"):
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE employees_fts USING fts5(
+                    name, position, department,
+                    content='employees', content_rowid='id', {options}
+                )
+            """)
+            break
+        except sqlite3.OperationalError as e:
+            print(f"База данных: FTS5 ({options}) недоступен: {e}")
+    else:
+        return
+    
+    conn.execute("""
+        CREATE TRIGGER employees_fts_ai AFTER INSERT ON employees BEGIN
+            INSERT INTO employees_fts(rowid, name, position, department)
+            VALUES (new.id, new.name, new.position, new.department);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER employees_fts_ad AFTER DELETE ON employees BEGIN
+            INSERT INTO employees_fts(employees_fts, rowid, name, position, department)
+            VALUES ('delete', old.id, old.name, old.position, old.department);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER employees_fts_au AFTER UPDATE ON employees BEGIN
+            INSERT INTO employees_fts(employees_fts, rowid, name, position, department)
+            VALUES ('delete', old.id, old.name, old.position, old.department);
+            INSERT INTO employees_fts(rowid, name, position, department)
+            VALUES (new.id, new.name, new.position, new.department);
+        END
+    """)
+    # Индексация уже существующих строк
+    conn.execute("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')")
+
+
+def department_stats_add_sql(row):
+    """SQL учета строки сотрудника (new/old) в department_stats"""
+    return f"""
+        INSERT INTO department_stats (department, employee_count, salary_count)
+        SELECT {row}.department, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM department_stats WHERE department IS {row}.department);
+        UPDATE department_stats SET
+            employee_count = employee_count + 1,
+            salary_count = salary_count + ({row}.salary IS NOT NULL),
+            salary_sum = CASE WHEN {row}.salary IS NULL THEN salary_sum
+                              ELSE IFNULL(salary_sum, 0) + {row}.salary END,
+            min_salary = CASE WHEN {row}.salary IS NOT NULL AND (min_salary IS NULL OR {row}.salary < min_salary)
+                              THEN {row}.salary ELSE min_salary END,
+            max_salary = CASE WHEN {row}.salary IS NOT NULL AND (max_salary IS NULL OR {row}.salary > max_salary)
+                              THEN {row}.salary ELSE max_salary END
+        WHERE department IS {row}.department;
+    """
+
+
+def department_stats_remove_sql(row):
+    """SQL исключения строки сотрудника (old) из department_stats
+
+    Минимум и максимум пересчитываются только при удалении граничного значения,
+    по индексу (department, salary).
+    """
+    return f"""
+        UPDATE department_stats SET
+            employee_count = employee_count - 1,
+            salary_count = salary_count - ({row}.salary IS NOT NULL),
+            salary_sum = CASE WHEN {row}.salary IS NULL THEN salary_sum
+                              WHEN salary_count = 1 THEN NULL
+                              ELSE salary_sum - {row}.salary END,
+            min_salary = CASE WHEN {row}.salary IS NOT NULL AND {row}.salary <= min_salary
+                              THEN (SELECT MIN(salary) FROM employees WHERE department IS {row}.department)
+                              ELSE min_salary END,
+            max_salary = CASE WHEN {row}.salary IS NOT NULL AND {row}.salary >= max_salary
+                              THEN (SELECT MAX(salary) FROM employees WHERE department IS {row}.department)
+                              ELSE max_salary END
+        WHERE department IS {row}.department;
+        DELETE FROM department_stats WHERE department IS {row}.department AND employee_count <= 0;
+    """
+
+
+def rebuild_department_stats(conn):
+    """Полный пересчет department_stats по таблице employees"""
+    conn.execute("DELETE FROM department_stats")
+    cursor = conn.execute("""
+        INSERT INTO department_stats
+            (department, employee_count, salary_count, salary_sum, min_salary, max_salary)
+        SELECT department, COUNT(*), COUNT(salary), SUM(salary), MIN(salary), MAX(salary)
+        FROM employees
+        GROUP BY department
+    """)
+    return [cursor.rowcount]
+
+
+# Миграции схемы: (версия, описание, шаги). Шаг - SQL строка или функция(conn).
+# Номер последней примененной миграции хранится в PRAGMA user_version.
+MIGRATIONS = [
+    (1, "Индексы для отчетов, фильтров и графиков", [
+        "CREATE INDEX IF NOT EXISTS idx_employees_department ON employees(department)",
+        "CREATE INDEX IF NOT EXISTS idx_employees_salary ON employees(salary)",
+        "CREATE INDEX IF NOT EXISTS idx_employees_hire_date ON employees(hire_date)",
+        "CREATE INDEX IF NOT EXISTS idx_employees_department_salary ON employees(department, salary)",
+    ]),
+    (2, "Полнотекстовый индекс по имени, должности и отделу", [
+        create_employees_fts,
+    ]),
+    (3, "Агрегаты по отделам, поддерживаемые триггерами", [
+        """
+        CREATE TABLE IF NOT EXISTS department_stats (
+            department TEXT UNIQUE,
+            employee_count INTEGER NOT NULL,
+            salary_count INTEGER NOT NULL,
+            salary_sum REAL,
+            min_salary REAL,
+            max_salary REAL
+        )
+        """,
+        f"""
+        CREATE TRIGGER department_stats_ai AFTER INSERT ON employees BEGIN
+            {department_stats_add_sql('new')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER department_stats_ad AFTER DELETE ON employees BEGIN
+            {department_stats_remove_sql('old')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER department_stats_au AFTER UPDATE OF department, salary ON employees BEGIN
+            {department_stats_remove_sql('old')}
+            {department_stats_add_sql('new')}
+        END
+        """,
+        rebuild_department_stats,
+    ]),
+    (4, "Индексы для сортировки по имени и должности", [
+        "CREATE INDEX IF NOT EXISTS idx_employees_name ON employees(name)",
+        "CREATE INDEX IF NOT EXISTS idx_employees_position ON employees(position)",
+    ]),
+]
 
 
 class DatabaseManager:
     """Класс для управления базой данных"""
     
+    @staticmethod
+    def schema_version(conn):
+        """Текущая версия схемы (PRAGMA user_version)"""
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    @staticmethod
+    def migrate(conn):
+        """Применение недостающих миграций, каждая в своей транзакции"""
+        current = DatabaseManager.schema_version(conn)
+        applied = []
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                # PRAGMA не поддерживает параметры, версия - целое число из MIGRATIONS
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"База данных: применена миграция {version} - {description}")
+            applied.append(version)
+        return applied
+    
+    @staticmethod
+    def fts_mode(db_path=DB_PATH):
+        """Режим полнотекстового индекса: 'trigram', 'prefix' или None (нет FTS5)"""
+        conn = sqlite3.connect(db_path)
+        try:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'"
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return 'trigram' if 'trigram' in row[0] else 'prefix'
+    
+    @staticmethod
+    def explain_query_plan(conn, query, params=()):
+        """План выполнения запроса (EXPLAIN QUERY PLAN), строки detail"""
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return [row[3] for row in rows]
+    
+    @staticmethod
+    def check_query_plans(db_path=DB_PATH):
+        """Планы выполнения основных запросов приложения"""
+        conn = sqlite3.connect(db_path)
+        try:
+            plans = []
+            for title, query, params in PLAN_CHECK_QUERIES:
+                try:
+                    plans.append((title, DatabaseManager.explain_query_plan(conn, query, params)))
+                except sqlite3.Error as e:
+                    plans.append((title, [f"недоступно: {e}"]))
+            return plans
+        finally:
+            conn.close()
+    
     @staticmethod
     def init_database():
         """Инициализация базы данных и создание тестовых данных"""
         try:
-            conn = sqlite3.connect('database.db')
+            conn = sqlite3.connect(DB_PATH)
             cursor = conn.cursor()
             
             # Создание таблицы
@@ -82,6 +963,9 @@ class DatabaseManager:
                 )
             ''')
             
+            # Индексы и прочие изменения схемы
+            DatabaseManager.migrate(conn)
+            
             # Добавление тестовых данных
             cursor.execute('SELECT COUNT(*) FROM employees')
             if cursor.fetchone()[0] == 0:
@@ -104,27 +988,1846 @@ class DatabaseManager:
                 )
             
             conn.commit()
+            
+            # Обновление статистики планировщика для индексов
+            cursor.execute("PRAGMA optimize")
             conn.close()
             return True
             
         except Exception as e:
-            print(f"Ошибка инициализации БД: {e}")
-            return False
+            print(f"Ошибка инициализации БД: {e}")
+            return False
+
+
+# SQL запросы статистики, отчетов и графиков
+
+# Статистика по отделам (запрос 2)
+DEPARTMENT_STATS_QUERY = """
+    SELECT department, employee_count as count, salary_sum / salary_count as avg_salary 
+    FROM department_stats 
+    ORDER BY department
+"""
+
+# Сотрудники с зарплатой выше средней (запрос 3)
+HIGH_SALARY_QUERY = """
+    SELECT name, position, salary 
+    FROM employees 
+    WHERE salary > (SELECT SUM(salary_sum) / SUM(salary_count) FROM department_stats)
+    ORDER BY salary DESC
+"""
+
+# Отчет по отделам
+DEPARTMENT_REPORT_QUERY = """
+    SELECT department, 
+           employee_count as total_employees,
+           min_salary,
+           max_salary,
+           salary_sum / salary_count as avg_salary
+    FROM department_stats 
+    ORDER BY avg_salary DESC
+"""
+
+# Отчет по зарплатам
+SALARY_REPORT_QUERY = """
+    SELECT name, position, department, salary,
+           CASE 
+               WHEN salary < 70000 THEN 'Низкая'
+               WHEN salary < 85000 THEN 'Средняя'
+               ELSE 'Высокая'
+           END as salary_category
+    FROM employees 
+    ORDER BY salary DESC
+"""
+
+# График зарплат по отделам
+SALARY_CHART_QUERY = """
+    SELECT department, salary_sum / salary_count as avg_salary, employee_count as count
+    FROM department_stats 
+    ORDER BY avg_salary DESC
+"""
+
+# Круговая диаграмма по отделам
+PIE_CHART_QUERY = """
+    SELECT department, employee_count as count
+    FROM department_stats 
+    ORDER BY count DESC
+"""
+
+# График динамики найма
+HIRE_CHART_QUERY = """
+    SELECT hire_date, COUNT(*) as count
+    FROM employees 
+    GROUP BY hire_date
+    ORDER BY hire_date
+"""
+
+# Распределение зарплат: номер интервала гистограммы считается в SQL по индексу salary
+SALARY_HISTOGRAM_QUERY = """
+    SELECT MIN(CAST((salary - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) as count
+    FROM employees
+    WHERE salary IS NOT NULL
+    GROUP BY bin
+    ORDER BY bin
+"""
+
+# Перцентили зарплаты в отчете о распределении
+SALARY_PERCENTILES = (50, 90, 99)
+DEFAULT_SALARY_BINS = 10
+
+
+def interpolate_percentile(count, percent, values_at):
+    """Перцентиль с линейной интерполяцией, как numpy.percentile по умолчанию
+
+    values_at(offset) возвращает значения отсортированного ряда начиная с offset
+    (нужны не больше двух).
+    """
+    position = (count - 1) * percent / 100
+    lower = int(position)
+    values = values_at(lower)
+    if len(values) == 1 or position == lower:
+        return float(values[0])
+    return float(values[0] + (values[1] - values[0]) * (position - lower))
+
+
+def histogram_bins(low, high, bins):
+    """Ширина интервала гистограммы зарплат (ненулевая, даже если все зарплаты равны)"""
+    return (high - low) / bins or 1.0
+
+
+def salary_distribution(conn, bins=DEFAULT_SALARY_BINS, percents=SALARY_PERCENTILES):
+    """Распределение зарплат средствами SQLite
+
+    Интервалы гистограммы считаются одним GROUP BY, перцентили - выборкой двух
+    соседних значений по индексам salary и (department, salary) со смещением.
+    Количества считаются COUNT(salary) по тем же индексам в той же транзакции
+    чтения, поэтому смещения не выходят за ряд, даже если department_stats
+    разошлась с таблицей. Каждый перцентиль - проход по индексу до смещения,
+    то есть O(N) на перцентиль и отдел; для больших таблиц быстрее снимок в
+    памяти (EmployeeSnapshot.salary_distribution). Возвращает словарь: total,
+    low, high, width, bins [(от, до, количество)], overall (перцентили) и
+    departments [(отдел, количество, перцентили...)].
+    """
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute("BEGIN")
+    try:
+        return read_salary_distribution(conn, bins, percents)
+    finally:
+        if own_transaction:
+            conn.rollback()
+
+
+def read_salary_distribution(conn, bins, percents):
+    """Тело salary_distribution, выполняемое внутри одной транзакции чтения"""
+    total, low, high = conn.execute(
+        "SELECT COUNT(salary), MIN(salary), MAX(salary) FROM employees"
+    ).fetchone()
+    result = {'total': total or 0, 'low': low, 'high': high, 'width': None,
+              'bins': [], 'overall': None, 'departments': []}
+    if not total:
+        return result
+    
+    width = histogram_bins(low, high, bins)
+    counts = dict(conn.execute(SALARY_HISTOGRAM_QUERY, [low, width, bins - 1]).fetchall())
+    result['width'] = width
+    result['bins'] = [(low + i * width, low + (i + 1) * width, counts.get(i, 0)) for i in range(bins)]
+    
+    def sorted_salaries(where, params):
+        query = (f"SELECT salary FROM employees WHERE {where} salary IS NOT NULL "
+                 f"ORDER BY salary LIMIT 2 OFFSET ?")
+        return lambda offset: [row[0] for row in conn.execute(query, params + [offset])]
+    
+    overall = sorted_salaries("", [])
+    result['overall'] = [interpolate_percentile(total, p, overall) for p in percents]
+    
+    departments = conn.execute(
+        "SELECT department, COUNT(salary) FROM employees WHERE salary IS NOT NULL GROUP BY department"
+    ).fetchall()
+    for department, count in sorted(departments, key=lambda row: department_sort_key(row[0])):
+        values = sorted_salaries("department IS ? AND", [department])
+        result['departments'].append(
+            (department, count) + tuple(interpolate_percentile(count, p, values) for p in percents))
+    return result
+
+
+def department_sort_key(department):
+    """Порядок отделов как в SQLite: NULL первым, далее по значению"""
+    return (department is not None, department or "")
+
+
+# Запросы для проверки использования индексов: (название, SQL, параметры)
+PLAN_CHECK_QUERIES = [
+    ("Статистика по отделам", DEPARTMENT_STATS_QUERY, ()),
+    ("Зарплата выше средней", HIGH_SALARY_QUERY, ()),
+    ("Отчет по отделам", DEPARTMENT_REPORT_QUERY, ()),
+    ("Отчет по зарплатам", SALARY_REPORT_QUERY, ()),
+    ("Фильтр по минимальной зарплате", "SELECT * FROM employees WHERE salary >= ?", (80000,)),
+    ("Фильтр по имени (FTS5)",
+     "SELECT * FROM employees WHERE id IN "
+     "(SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)", ('name : "ван"',)),
+    ("Сортировка по зарплате (keyset)",
+     "SELECT * FROM employees WHERE (salary, id) > (?, ?) ORDER BY salary ASC, id ASC LIMIT ?",
+     (50000, 0, DEFAULT_PAGE_SIZE)),
+    ("Сортировка по имени (по убыванию)",
+     "SELECT * FROM employees ORDER BY name DESC, id DESC LIMIT ?", (DEFAULT_PAGE_SIZE,)),
+    ("Гистограмма зарплат", SALARY_HISTOGRAM_QUERY, (50000, 5000, 9)),
+    ("Перцентиль зарплаты в отделе",
+     "SELECT salary FROM employees WHERE department IS ? AND salary IS NOT NULL "
+     "ORDER BY salary LIMIT 2 OFFSET ?", ('IT', 10)),
+    ("График зарплат", SALARY_CHART_QUERY, ()),
+    ("Круговая диаграмма", PIE_CHART_QUERY, ()),
+    ("Динамика найма", HIRE_CHART_QUERY, ()),
+]
+
+
+def fts_term(column, text, fts_mode):
+    """Выражение MATCH для поиска text в колонке column или None, если FTS5 не подходит"""
+    if fts_mode == 'trigram':
+        # Триграммному индексу нужны минимум 3 символа
+        if len(text) < 3:
+            return None
+        return f'{column} : "{text.replace(chr(34), chr(34) * 2)}"'
+    if fts_mode == 'prefix':
+        words = [word.replace('"', '""') for word in text.split()]
+        if not words:
+            return None
+        return f'{column} : (' + " ".join(f'"{word}"*' for word in words) + ')'
+    return None
+
+
+def build_filter_query(name_filter, dept_filter, min_salary, fts_mode=None,
+                       sort_field="id", descending=False):
+    """SQL и параметры запроса вкладки фильтров
+
+    Текстовые фильтры по возможности выполняются через индекс employees_fts,
+    иначе через LIKE '%...%'. Результат упорядочен по sort_field.
+    """
+    query = "SELECT * FROM employees WHERE 1=1"
+    params = []
+    match_terms = []
+    
+    for column, text in (("name", name_filter), ("department", dept_filter)):
+        if not text:
+            continue
+        term = fts_term(column, text, fts_mode)
+        if term:
+            match_terms.append(term)
+        else:
+            query += f" AND {column} LIKE ?"
+            params.append(f"%{text}%")
+    
+    if match_terms:
+        query += " AND id IN (SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)"
+        params.append(" AND ".join(match_terms))
+        
+    if min_salary:
+        try:
+            salary = float(min_salary)
+            query += " AND salary >= ?"
+            params.append(salary)
+        except ValueError:
+            pass
+    
+    query += order_by_clause(sort_field, descending)
+    return query, params
+
+
+# Заголовки колонок таблицы employees
+EMPLOYEE_HEADERS = ["ID", "Имя", "Должность", "Отдел", "Зарплата", "Дата найма"]
+
+# Соответствие пунктов выбора поля колонкам таблицы employees
+COLUMN_FIELDS = {
+    "Имя": "name",
+    "Должность": "position",
+    "Отдел": "department",
+    "Зарплата": "salary",
+    "Дата найма": "hire_date",
+}
+
+# Колонки, по которым таблицы сортируются запросом к базе (все покрыты индексами)
+SORT_FIELDS = dict(COLUMN_FIELDS, ID="id")
+
+
+def order_by_clause(field, descending=False):
+    """ORDER BY по полю, id - второй ключ, чтобы порядок был однозначным"""
+    direction = "DESC" if descending else "ASC"
+    if field == "id":
+        return f" ORDER BY id {direction}"
+    return f" ORDER BY {field} {direction}, id {direction}"
+
+
+# Ключ keyset-пагинации «начало второго участка» (см. keyset_condition)
+SEGMENT_BOUNDARY = (None, None)
+
+
+def keyset_condition(field, key, descending=False, inclusive=False):
+    """Условие «строки после ключа» в порядке order_by_clause и его параметры
+
+    Ключ - id или пара (значение поля, id). SQLite ставит NULL раньше любых
+    значений: при возрастании строки с NULL в поле идут первым участком, при
+    убывании - последним. Чтобы запрос оставался поиском по индексу, условие
+    для пары охватывает только участок ключа, если он не последний: следующий
+    участок выбирается по ключу SEGMENT_BOUNDARY (см. key_segment_limited).
+    """
+    operator = ("<" if descending else ">") + ("=" if inclusive else "")
+    if field == "id":
+        return f"id {operator} ?", [key]
+    value, key_id = key
+    if key_id is None:
+        return f"{field} IS {'' if descending else 'NOT '}NULL", []
+    if value is None:
+        return f"{field} IS NULL AND id {operator} ?", [key_id]
+    return f"({field}, id) {operator} (?, ?)", [value, key_id]
+
+
+def key_segment_limited(key, descending=False):
+    """Ограничено ли условие keyset_condition(key) участком ключа, за которым есть другой"""
+    if not isinstance(key, tuple) or key == SEGMENT_BOUNDARY:
+        return False
+    return (key[0] is None) != descending
+
+
+def employee_page_query(select_list, field, descending, after_key=None, inclusive=False):
+    """SELECT по employees в порядке постраничного просмотра
+
+    Строки берутся после ключа after_key (включительно при inclusive) или
+    с начала таблицы.
+    """
+    query = f"SELECT {select_list} FROM employees"
+    params = []
+    if after_key is not None:
+        condition, params = keyset_condition(field, after_key, descending, inclusive)
+        query += " WHERE " + condition
+    return query + order_by_clause(field, descending), params
+
+
+def employee_range_query(select_list, field, descending, start_key=None):
+    """SELECT всего диапазона постраничного просмотра (для экспорта)
+
+    Диапазон - с начала таблицы или со строки с ключом start_key включительно
+    вместе со следующим участком, если участок ключа не последний.
+    """
+    if start_key is None:
+        return employee_page_query(select_list, field, descending)
+    condition, params = keyset_condition(field, start_key, descending, inclusive=True)
+    if key_segment_limited(start_key, descending):
+        rest, _ = keyset_condition(field, SEGMENT_BOUNDARY, descending)
+        condition = f"({condition}) OR {rest}"
+    query = f"SELECT {select_list} FROM employees WHERE {condition}"
+    return query + order_by_clause(field, descending), params
+
+
+def employee_start_page(conn, select_list, field, descending, start_id, limit):
+    """Первая страница просмотра со строки start_id
+
+    Ключ начальной строки выбирается заранее, тогда условие страницы - поиск
+    по индексу, как и для следующих страниц.
+    """
+    key_list = "id" if field == "id" else f"{field}, id"
+    key = conn.execute(f"SELECT {key_list} FROM employees WHERE id >= ? ORDER BY id LIMIT 1",
+                       [start_id]).fetchone()
+    if key is None:
+        return []
+    query, params = employee_page_query(select_list, field, descending,
+                                        key[0] if field == "id" else key, inclusive=True)
+    return conn.execute(query + " LIMIT ?", params + [limit]).fetchall()
+
+
+# Импорт сотрудников из CSV
+
+INSERT_EMPLOYEE_SQL = (
+    "INSERT INTO employees (name, position, department, salary, hire_date) VALUES (?, ?, ?, ?, ?)"
+)
+IMPORT_FIELDS = ("name", "position", "department", "salary", "hire_date")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+
+def csv_field_indexes(header):
+    """Номера колонок CSV для полей IMPORT_FIELDS (заголовки на английском или русском)"""
+    aliases = {field: field for field in IMPORT_FIELDS}
+    aliases.update({label.lower(): field for label, field in COLUMN_FIELDS.items()})
+    positions = {}
+    for index, title in enumerate(header):
+        field = aliases.get(title.strip().lower())
+        if field and field not in positions:
+            positions[field] = index
+    missing = [field for field in IMPORT_FIELDS if field not in positions]
+    if missing:
+        raise ValueError(f"В CSV нет колонок: {', '.join(missing)}")
+    return [positions[field] for field in IMPORT_FIELDS]
+
+
+def validate_employee_row(values):
+    """Проверка строки CSV: (кортеж для INSERT, None) или (None, причина отказа)"""
+    name, position, department, salary, hire_date = (value.strip() for value in values)
+    if not all([name, position, department, salary, hire_date]):
+        return None, "не заполнены все поля"
+    try:
+        salary_val = float(salary.replace(',', '.'))
+    except ValueError:
+        return None, f"зарплата не число: {salary}"
+    if salary_val < 0:
+        return None, f"отрицательная зарплата: {salary}"
+    if not DATE_PATTERN.match(hire_date):
+        return None, f"дата не в формате ГГГГ-ММ-ДД: {hire_date}"
+    try:
+        datetime.date(int(hire_date[:4]), int(hire_date[5:7]), int(hire_date[8:10]))
+    except ValueError:
+        return None, f"несуществующая дата: {hire_date}"
+    return (name, position, department, salary_val, hire_date), None
+
+
+def insert_employees(rows):
+    """Операция потока записи: вставка пакета проверенных строк сотрудников"""
+    def import_employees(conn):
+        conn.executemany(INSERT_EMPLOYEE_SQL, rows)
+        return [len(rows)]
+    return import_employees
+
+
+def import_employees_csv(write_batch, path, batch_size=IMPORT_BATCH_SIZE, progress=None,
+                         should_stop=None):
+    """Потоковый импорт сотрудников из CSV пакетами
+
+    write_batch(rows) записывает и фиксирует пакет строк (в приложении - через
+    поток записи, см. insert_employees). В памяти держится только текущий пакет. Отклоненные строки с причиной
+    записываются в файл <path>.rejected.csv. progress({'imported', 'rejected', 'percent'})
+    вызывается после каждого зафиксированного пакета, should_stop() позволяет
+    прервать импорт между пакетами.
+    """
+    started = time.perf_counter()
+    total_bytes = os.path.getsize(path) or 1
+    rejected_path = path + ".rejected.csv"
+    imported = rejected = 0
+    cancelled = False
+    
+    with open(path, newline='', encoding='utf-8-sig') as source, \
+            open(rejected_path, 'w', newline='', encoding='utf-8') as rejected_file:
+        sample = source.read(4096)
+        source.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(source, dialect)
+        
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Файл CSV пуст")
+        indexes = csv_field_indexes(header)
+        rejected_writer = csv.writer(rejected_file)
+        rejected_writer.writerow(["line", "reason"] + header)
+        
+        batch = []
+        for values in reader:
+            if not values:
+                continue
+            try:
+                row, reason = validate_employee_row([values[index] for index in indexes])
+            except IndexError:
+                row, reason = None, "не хватает колонок"
+            if row is None:
+                rejected += 1
+                rejected_writer.writerow([reader.line_num, reason] + values)
+                continue
+            
+            batch.append(row)
+            if len(batch) >= batch_size:
+                write_batch(batch)
+                imported += len(batch)
+                batch = []
+                if progress:
+                    progress({'imported': imported, 'rejected': rejected,
+                              'percent': min(99, source.buffer.tell() * 100 // total_bytes)})
+                if should_stop and should_stop():
+                    cancelled = True
+                    break
+        
+        if batch and not cancelled:
+            write_batch(batch)
+            imported += len(batch)
+    
+    if not rejected:
+        os.remove(rejected_path)
+    if progress:
+        progress({'imported': imported, 'rejected': rejected, 'percent': 100})
+    
+    seconds = time.perf_counter() - started
+    return {
+        'imported': imported,
+        'rejected': rejected,
+        'rejected_path': rejected_path if rejected else None,
+        'cancelled': cancelled,
+        'seconds': seconds,
+        'rows_per_sec': imported / seconds if seconds > 0 else 0.0,
+    }
+
+
+# Экспорт результатов запросов
+
+EXPORT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.parquet': 'parquet'}
+
+
+def declared_column_types(conn, names):
+    """Объявленные типы колонок результата по именам колонок таблиц базы
+
+    sqlite3 не сообщает типы колонок результата (cursor.description содержит
+    только имена), поэтому тип берется из PRAGMA table_info таблицы с колонкой
+    того же имени. Для вычисляемых колонок возвращается None.
+    """
+    declared = {}
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        for column in conn.execute(f"PRAGMA table_info({quote_identifier(table)})"):
+            declared.setdefault(column[1].lower(), column[2].upper())
+    return [declared.get(name.lower()) for name in names]
+
+
+def quote_identifier(name):
+    """Имя таблицы или колонки в кавычках для подстановки в SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def parquet_writer(path, headers, rows, declared=()):
+    """ParquetWriter со схемой по первой порции и объявленным типам колонок
+
+    Тип колонки определяется по первому непустому значению порции. Если в первой
+    порции значений нет, тип берется из объявленного (declared, по правилам
+    сродства SQLite), а без него колонка становится строковой и значения
+    следующих порций записываются в ней строками. pyarrow - необязательная
+    зависимость.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для экспорта в Parquet необходимо установить pyarrow: pip install pyarrow")
+    
+    declared = list(declared) or [None] * len(headers)
+    fields = []
+    for header, column, declared_type in zip(headers, zip(*rows), declared):
+        sample = next((value for value in column if value is not None), None)
+        if sample is None and declared_type:
+            # Пример значения заменяется значением типа по сродству колонки
+            if "INT" in declared_type:
+                sample = 0
+            elif any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+                sample = 0.0
+        if isinstance(sample, int):
+            field_type = pa.int64()
+        elif isinstance(sample, float):
+            field_type = pa.float64()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(header, field_type))
+    schema = pa.schema(fields)
+    
+    writer = pq.ParquetWriter(path, schema)
+    
+    def write(batch):
+        arrays = []
+        for column, field in zip(zip(*batch), schema):
+            if field.type == pa.string():
+                column = [None if value is None else str(value) for value in column]
+            arrays.append(pa.array(column, type=field.type))
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    
+    return write, writer.close
+
+
+def export_query(conn, query, params, headers, path, chunk_size=STREAM_CHUNK_SIZE,
+                 progress=None, should_stop=None):
+    """Потоковая выгрузка результата запроса в CSV, JSONL или Parquet
+
+    Строки читаются курсором порциями fetchmany и сразу записываются в файл,
+    формат определяется по расширению. progress({'rows', 'bytes'}) вызывается
+    после каждой порции, при отмене (should_stop) частичный файл удаляется.
+    """
+    fmt = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Неизвестный формат файла: {path}")
+    
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows_written = 0
+    cancelled = False
+    
+    if fmt == 'parquet':
+        write = close = None
+    else:
+        target = open(path, 'w', newline='', encoding='utf-8')
+        if fmt == 'csv':
+            writer = csv.writer(target)
+            writer.writerow(headers)
+            write = writer.writerows
+        else:
+            def write(batch):
+                target.write("".join(json.dumps(dict(zip(headers, row)), ensure_ascii=False) + "\n"
+                                     for row in batch))
+        close = target.close
+    
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if write is None:
+                names = [column[0] for column in cursor.description]
+                write, close = parquet_writer(path, headers, rows, declared_column_types(conn, names))
+            write(rows)
+            rows_written += len(rows)
+            if progress:
+                progress({'rows': rows_written, 'bytes': os.path.getsize(path)})
+            if should_stop and should_stop():
+                cancelled = True
+                break
+    finally:
+        cursor.close()
+        if close is not None:
+            close()
+    
+    if write is None and not cancelled:
+        # Пустой результат: файл Parquet создается с текстовой схемой по заголовкам
+        write, close = parquet_writer(path, headers, [tuple("" for _ in headers)])
+        close()
+    
+    bytes_written = 0
+    if cancelled:
+        os.remove(path)
+    elif os.path.exists(path):
+        bytes_written = os.path.getsize(path)
+    
+    seconds = time.perf_counter() - started
+    return {
+        'path': path,
+        'rows': rows_written,
+        'bytes': bytes_written,
+        'cancelled': cancelled,
+        'seconds': seconds,
+        'rows_per_sec': rows_written / seconds if seconds > 0 else 0.0,
+    }
+
+
+def load_numpy():
+    """Импорт NumPy для снимка в памяти; False - если библиотека недоступна"""
+    global NUMPY_AVAILABLE, np
+    if NUMPY_AVAILABLE and np is None:
+        try:
+            np = importlib.import_module("numpy")
+        except ImportError as e:
+            print(f"Ошибка загрузки NumPy: {e}")
+            NUMPY_AVAILABLE = False
+    return NUMPY_AVAILABLE
+
+
+class EmployeeSnapshot:
+    """Колоночный снимок employees в памяти для векторизованной аналитики (NumPy)
+
+    Зарплата и дата найма хранятся массивами float64 и datetime64[D] (пропуски -
+    NaN и NaT), отдел и должность - кодами словарей. У массивов есть запас
+    емкости, поэтому добавление строк не копирует данные. Строки снимка -
+    (id, position, department, salary, hire_date), то есть строка employees без имени.
+    Фильтры остаются запросами к базе: им нужны строки целиком, с именами.
+    """
+
+    SELECT_QUERY = "SELECT id, position, department, salary, hire_date FROM employees"
+
+    def __init__(self, capacity=1024):
+        if not load_numpy():
+            raise ImportError("Для снимка в памяти нужен NumPy")
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.position_codes = np.empty(capacity, dtype=np.int32)
+        self.department_codes = np.empty(capacity, dtype=np.int32)
+        self.salaries = np.empty(capacity, dtype=np.float64)
+        self.hire_dates = np.empty(capacity, dtype='datetime64[D]')
+        # Словари кодов: код -> значение и значение -> код
+        self.positions, self.position_index = [], {}
+        self.departments, self.department_index = [], {}
+
+    @classmethod
+    def load(cls, conn, chunk_size=STREAM_CHUNK_SIZE, should_stop=None):
+        """Построить снимок по таблице employees, читая ее порциями"""
+        snapshot = cls()
+        cursor = conn.execute(cls.SELECT_QUERY)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if should_stop and should_stop():
+                raise sqlite3.OperationalError("interrupted")
+            snapshot.append_rows(rows)
+        return snapshot
+
+    @staticmethod
+    def encode(values, names, index):
+        """Коды значений по словарю, новые значения добавляются в словарь"""
+        codes = []
+        for value in values:
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(names)
+                names.append(value)
+            codes.append(code)
+        return np.array(codes, dtype=np.int32)
+
+    @staticmethod
+    def to_dates(values):
+        """Даты 'YYYY-MM-DD' в datetime64[D], некорректные значения - NaT"""
+        try:
+            return np.array(values, dtype='datetime64[D]')
+        except ValueError:
+            dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+            for i, value in enumerate(values):
+                try:
+                    dates[i] = np.datetime64(value, 'D')
+                except (ValueError, TypeError):
+                    pass
+            return dates
+
+    def reserve(self, size):
+        """Увеличить емкость массивов (вдвое) до size строк"""
+        capacity = len(self.ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ('ids', 'position_codes', 'department_codes', 'salaries', 'hire_dates'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append_rows(self, rows):
+        """Добавить строки (id, position, department, salary, hire_date)"""
+        if not rows:
+            return
+        ids, positions, departments, salaries, hire_dates = zip(*rows)
+        first, last = self.size, self.size + len(rows)
+        self.reserve(last)
+        self.ids[first:last] = ids
+        self.position_codes[first:last] = self.encode(positions, self.positions, self.position_index)
+        self.department_codes[first:last] = self.encode(departments, self.departments, self.department_index)
+        self.salaries[first:last] = [np.nan if salary is None else salary for salary in salaries]
+        self.hire_dates[first:last] = self.to_dates(hire_dates)
+        self.size = last
+
+    def remove_ids(self, ids):
+        """Удалить строки с указанными id (оставшиеся сдвигаются за один проход)"""
+        keep = ~np.isin(self.ids[:self.size], np.fromiter(ids, dtype=np.int64))
+        kept = int(keep.sum())
+        if kept == self.size:
+            return 0
+        for name in ('ids', 'position_codes', 'department_codes', 'salaries', 'hire_dates'):
+            column = getattr(self, name)
+            column[:kept] = column[:self.size][keep]
+        removed, self.size = self.size - kept, kept
+        return removed
+
+    def column(self, name):
+        """Заполненная часть колонки (без копирования)"""
+        return getattr(self, name)[:self.size]
+
+    def department_aggregates(self):
+        """Агрегаты по отделам: [(отдел, сотрудников, минимум, максимум, средняя)]
+
+        Как и department_stats, зарплаты NULL не участвуют в минимуме, максимуме
+        и средней, но сотрудник учитывается в количестве.
+        """
+        groups = len(self.departments)
+        codes = self.column('department_codes')
+        salaries = self.column('salaries')
+        valid = ~np.isnan(salaries)
+        counts = np.bincount(codes, minlength=groups)
+        salary_counts = np.bincount(codes[valid], minlength=groups)
+        sums = np.bincount(codes[valid], weights=salaries[valid], minlength=groups)
+        minimums = np.full(groups, np.inf)
+        maximums = np.full(groups, -np.inf)
+        np.minimum.at(minimums, codes[valid], salaries[valid])
+        np.maximum.at(maximums, codes[valid], salaries[valid])
+        
+        result = []
+        for code in np.flatnonzero(counts):
+            if salary_counts[code]:
+                result.append((self.departments[code], int(counts[code]), float(minimums[code]),
+                               float(maximums[code]), float(sums[code] / salary_counts[code])))
+            else:
+                result.append((self.departments[code], int(counts[code]), None, None, None))
+        return result
+
+    def department_stats_rows(self):
+        """Строки в формате DEPARTMENT_STATS_QUERY"""
+        rows = [(department, count, avg)
+                for department, count, _, _, avg in self.department_aggregates()]
+        return sorted(rows, key=lambda row: department_sort_key(row[0]))
+
+    def department_report_rows(self):
+        """Строки в формате DEPARTMENT_REPORT_QUERY"""
+        rows = self.department_aggregates()
+        return sorted(rows, key=lambda row: -row[4] if row[4] is not None else float('inf'))
+
+    def salary_chart_rows(self):
+        """Строки в формате SALARY_CHART_QUERY"""
+        return [(department, avg, count) for department, count, _, _, avg in self.department_report_rows()]
+
+    def pie_chart_rows(self):
+        """Строки в формате PIE_CHART_QUERY"""
+        rows = [(department, count) for department, count, _, _, _ in self.department_aggregates()]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def hire_chart_rows(self):
+        """Строки в формате HIRE_CHART_QUERY (без пустых дат)"""
+        dates = self.column('hire_dates')
+        dates, counts = np.unique(dates[~np.isnat(dates)], return_counts=True)
+        return [(str(date), int(count)) for date, count in zip(dates, counts)]
+
+    def salary_distribution(self, bins=DEFAULT_SALARY_BINS, percents=SALARY_PERCENTILES):
+        """Распределение зарплат в формате salary_distribution(), векторно"""
+        salaries = self.column('salaries')
+        valid = ~np.isnan(salaries)
+        salaries, codes = salaries[valid], self.column('department_codes')[valid]
+        result = {'total': len(salaries), 'low': None, 'high': None, 'width': None,
+                  'bins': [], 'overall': None, 'departments': []}
+        if not len(salaries):
+            return result
+        
+        low, high = float(salaries.min()), float(salaries.max())
+        width = histogram_bins(low, high, bins)
+        # Те же интервалы, что и в SALARY_HISTOGRAM_QUERY
+        counts = np.bincount(np.minimum(((salaries - low) / width).astype(np.int64), bins - 1),
+                             minlength=bins)
+        result.update(low=low, high=high, width=width)
+        result['bins'] = [(low + i * width, low + (i + 1) * width, int(counts[i])) for i in range(bins)]
+        result['overall'] = [float(value) for value in np.percentile(salaries, percents)]
+        
+        # Сортировка по (отдел, зарплата) - отделы становятся непрерывными срезами
+        order = np.lexsort((salaries, codes))
+        salaries, codes = salaries[order], codes[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        departments = []
+        for start, stop in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(codes)]))):
+            values = salaries[start:stop]
+            departments.append((self.departments[codes[start]], int(stop - start)) +
+                               tuple(float(value) for value in np.percentile(values, percents)))
+        result['departments'] = sorted(departments, key=lambda row: department_sort_key(row[0]))
+        return result
+
+    def nbytes(self):
+        """Объем массивов снимка в байтах"""
+        return sum(getattr(self, name).nbytes for name in
+                   ('ids', 'position_codes', 'department_codes', 'salaries', 'hire_dates'))
+
+
+class JobSignals(QObject):
+    """Сигналы длительной задачи"""
+    progress = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+
+class PoolJob(QRunnable):
+    """Длительная задача пула (импорт, экспорт) с ходом выполнения и отменой
+
+    job(conn, progress, should_stop) возвращает словарь итогов. Если задан cache,
+    задача считается изменяющей данные и сбрасывает кэш при каждом progress.
+    """
+
+    def __init__(self, job, pool, cache=None):
+        super().__init__()
+        self.job = job
+        self.pool = pool
+        self.cache = cache
+        self.cancelled = False
+        self.setAutoDelete(False)
+        self.signals = JobSignals()
+
+    def start(self):
+        """Отправить задачу в пул подключений"""
+        self.pool.submit(self)
+
+    def cancel(self):
+        """Остановить задачу на ближайшей проверке should_stop"""
+        self.cancelled = True
+
+    def on_progress(self, state):
+        if self.cache is not None:
+            self.cache.invalidate()
+        self.signals.progress.emit(state)
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            conn = self.pool.connection()
+            stats = self.job(conn, self.on_progress, lambda: self.cancelled)
+            if self.cache is not None:
+                self.cache.invalidate()
+            self.pool.record(True, time.perf_counter() - started)
+            self.signals.finished.emit(stats)
+        except Exception as e:
+            print(f"Ошибка фоновой задачи: {e}")
+            self.pool.record(False, time.perf_counter() - started)
+            self.signals.error.emit(str(e))
+
+
+def pack_column(values, shared=None):
+    """Упаковка колонки в компактный массив (числа) или список (остальное)
+
+    Если передан словарь shared, в колонке с частыми повторами одинаковые
+    значения заменяются одним общим объектом из shared.
+    """
+    if values and all(type(v) is int for v in values):
+        return array('q', values)
+    if values and all(type(v) in (int, float) for v in values):
+        return array('d', values)
+    if shared is not None and is_repetitive(values):
+        return [shared.setdefault(v, v) for v in values]
+    return list(values)
+
+
+def is_repetitive(values, sample=256):
+    """Не больше половины различных значений среди первых sample значений колонки"""
+    head = values[:sample]
+    return len(set(head)) * 2 <= len(head)
+
+
+class ResultSet:
+    """Результат запроса, хранящийся по колонкам (см. pack_column)
+
+    Числовые колонки - массивы array, остальные - списки, в которых повторяющиеся
+    строки (отдел, должность) представлены одним объектом. Модели и графики
+    читают колонки напрямую; для обработчиков, ожидающих список кортежей,
+    поддерживаются len, итерация, индекс и срез по строкам.
+    """
+
+    __slots__ = ('columns', 'row_count')
+
+    def __init__(self, columns, row_count):
+        self.columns = columns
+        self.row_count = row_count
+
+    @classmethod
+    def from_rows(cls, rows, width, shared=None):
+        """Упаковать список кортежей шириной width"""
+        if not rows:
+            return cls([[] for _ in range(width)], 0)
+        if shared is None:
+            shared = {}
+        return cls([pack_column(values, shared) for values in zip(*rows)], len(rows))
+
+    @classmethod
+    def fetch(cls, cursor, size=None, shared=None):
+        """Выбрать из курсора все строки или порцию size строк"""
+        rows = cursor.fetchall() if size is None else cursor.fetchmany(size)
+        return cls.from_rows(rows, len(cursor.description or ()), shared)
+
+    def __len__(self):
+        return self.row_count
+
+    def __iter__(self):
+        return zip(*self.columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(*(column[index] for column in self.columns)))
+        return tuple(column[index] for column in self.columns)
+
+    def nbytes(self, sample=100):
+        """Приблизительный объем в байтах; значения списков оцениваются по первым sample"""
+        size = sys.getsizeof(self)
+        for column in self.columns:
+            size += sys.getsizeof(column)
+            if isinstance(column, list) and column:
+                # Общие объекты в выборке учитываются один раз
+                head = {id(value): value for value in column[:sample]}
+                size += sum(sys.getsizeof(value) for value in head.values()) * len(column) // len(column[:sample])
+        return size
+
+
+def result_columns(rows, width):
+    """Первые width колонок результата: у ResultSet - свои, список кортежей транспонируется"""
+    if not rows:
+        return [[] for _ in range(width)]
+    if isinstance(rows, ResultSet):
+        return rows.columns[:width]
+    return [list(values) for values in zip(*rows)][:width]
+
+
+def null_first_key(value):
+    """Ключ сравнения в порядке SQLite, где NULL меньше любого значения"""
+    return (value is not None, value)
+
+
+def extend_column(column, values):
+    """Дописать значения в колонку, при несовпадении типов переходя на список"""
+    if isinstance(column, array):
+        if isinstance(values, array) and values.typecode == column.typecode:
+            column.extend(values)
+            return column
+        try:
+            column.extend(array(column.typecode, values))
+            return column
+        except (TypeError, OverflowError):
+            column = list(column)
+    column.extend(values)
+    return column
+
+
+def insert_value(column, position, value):
+    """Вставить значение в колонку, при несовпадении типов переходя на список"""
+    if isinstance(column, array):
+        try:
+            column.insert(position, value)
+            return column
+        except (TypeError, OverflowError):
+            column = list(column)
+    column.insert(position, value)
+    return column
+
+
+class EmployeeTableModel(QAbstractTableModel):
+    """Модель результата запроса, хранящая данные по колонкам
+
+    Первые hidden колонок строк хранятся, но не отображаются (например, id
+    как ключ для точечного удаления строк при выводе одной колонки). Последние
+    extra_columns заголовков не имеют данных (например, колонка кнопок).
+    sort_column и descending описывают порядок, в котором строки выданы
+    запросом: по ним новые строки вставляются на свое место.
+    """
+
+    def __init__(self, headers=None, parent=None, extra_columns=0):
+        super().__init__(parent)
+        self.headers = list(headers or EMPLOYEE_HEADERS)
+        self.extra_columns = extra_columns
+        self.hidden = 0
+        self.sort_column = 0
+        self.descending = False
+        self.columns = [[] for _ in range(self.data_width())]
+        self.row_total = 0
+
+    def data_width(self):
+        """Число хранимых колонок: скрытые и отображаемые колонки с данными"""
+        return self.hidden + len(self.headers) - self.extra_columns
+
+    def set_rows(self, rows, headers=None, hidden=None):
+        """Заменить содержимое модели строками результата"""
+        self.beginResetModel()
+        if headers is not None:
+            self.headers = list(headers)
+        if hidden is not None:
+            self.hidden = hidden
+        if isinstance(rows, ResultSet) and rows:
+            # Копия колонок: тот же результат может лежать в кэше запросов
+            self.columns = [column[:] for column in rows.columns]
+        elif rows:
+            self.columns = [pack_column(column) for column in zip(*rows)]
+        else:
+            self.columns = [[] for _ in range(self.data_width())]
+        self.row_total = len(rows)
+        self.endResetModel()
+
+    def clear(self):
+        """Очистить модель"""
+        self.set_rows([])
+
+    def append_rows(self, rows):
+        """Дописать порцию строк в конец модели"""
+        if not rows:
+            return
+        first = self.row_total
+        packed = isinstance(rows, ResultSet)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for index, values in enumerate(rows.columns if packed else zip(*rows)):
+            if first == 0:
+                self.columns[index] = values[:] if packed else pack_column(values)
+            else:
+                self.columns[index] = extend_column(self.columns[index], values)
+        self.row_total += len(rows)
+        self.endInsertRows()
+
+    def sorted_position(self, values):
+        """Позиция строки values в текущем порядке модели (бинарный поиск по колонкам)"""
+        key = (null_first_key(values[self.sort_column]), values[0])
+        keys, ids = self.columns[self.sort_column], self.columns[0]
+        low, high = 0, self.row_total
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = (null_first_key(keys[middle]), ids[middle])
+            if (middle_key > key) if self.descending else (middle_key < key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def insert_row(self, position, values):
+        """Вставить одну строку в позицию position"""
+        self.beginInsertRows(QModelIndex(), position, position)
+        for index, value in enumerate(values):
+            self.columns[index] = insert_value(self.columns[index], position, value)
+        self.row_total += 1
+        self.endInsertRows()
+
+    def value(self, row, column):
+        """Исходное значение ячейки (column - номер колонки хранения)"""
+        return self.columns[column][row]
+
+    def employee_row(self, row):
+        """Строка в формате модели для полной строки таблицы employees
+
+        Скрытые колонки заполняются id, отображаемые - полями по заголовкам.
+        """
+        fields = [row[EMPLOYEE_HEADERS.index(header)]
+                  for header in self.headers if header in EMPLOYEE_HEADERS]
+        return tuple([row[0]] * self.hidden + fields)
+
+    def row_values(self, row):
+        """Исходные значения строки"""
+        return tuple(column[row] for column in self.columns)
+
+    def remove_keys(self, keys, key_column=0):
+        """Удалить строки, значение ключевой колонки которых входит в keys
+
+        Соседние строки удаляются диапазонами через beginRemoveRows, при большом
+        числе разрозненных диапазонов колонки пересобираются за один проход.
+        """
+        keys = set(keys)
+        rows = [row for row, key in enumerate(self.columns[key_column]) if key in keys]
+        if not rows:
+            return 0
+        
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        
+        if len(ranges) > 100:
+            removed = set(rows)
+            self.beginResetModel()
+            self.columns = [pack_column([value for row, value in enumerate(column) if row not in removed])
+                            for column in self.columns]
+            self.row_total -= len(rows)
+            self.endResetModel()
+            return len(rows)
+        
+        # С конца, чтобы номера оставшихся диапазонов не сдвигались
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for column in self.columns:
+                del column[first:last + 1]
+            self.row_total -= last - first + 1
+            self.endRemoveRows()
+        return len(rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_total
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        column = index.column() + self.hidden
+        if not index.isValid() or column >= len(self.columns):
+            return None
+        if role == Qt.DisplayRole:
+            # Строка формируется только для отображаемых ячеек
+            return str(self.columns[column][index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+
+class PagedEmployeeModel(EmployeeTableModel):
+    """Модель постраничного просмотра с keyset-пагинацией
+
+    Страницы подгружаются асинхронно через loader(after_key, limit, on_page, on_error)
+    по мере прокрутки (canFetchMore/fetchMore). Первая колонка строк страницы
+    всегда id; если show_key=False, она хранится скрытой и служит только ключом.
+    Порядок задается полем sort_field (колонка хранения sort_column), ключ
+    страницы - id или пара (значение поля, id) последней строки. Строки с NULL
+    в поле и остальные загружаются разными участками (см. keyset_condition).
+    """
+
+    def __init__(self, loader, headers=None, parent=None):
+        super().__init__(headers, parent)
+        self.loader = loader
+        self.page_size = DEFAULT_PAGE_SIZE
+        self.select_list = "*"
+        self.sort_field = "id"
+        self.show_key = True
+        self.start_id = None
+        # Ключ начальной строки просмотра с start_id (известен после первой страницы)
+        self.start_key = None
+        self.last_key = None
+        self.exhausted = True
+        self.loading = False
+        # Поколение сбрасывается при каждом новом просмотре, страницы прежних отбрасываются
+        self.generation = 0
+
+    def start(self, select_list, headers, show_key=True, start_id=None):
+        """Начать просмотр с начала таблицы или со строки с указанным id
+
+        Перед вызовом задаются sort_field, sort_column и descending.
+        """
+        self.generation += 1
+        self.select_list = select_list
+        self.show_key = show_key
+        self.start_id = start_id
+        self.start_key = None
+        self.last_key = None
+        self.exhausted = False
+        self.loading = False
+        self.set_rows([], headers, hidden=0 if show_key else 1)
+        self.fetchMore()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.loading = True
+        generation = self.generation
+        self.loader(self.last_key, self.page_size,
+                    lambda rows: self.add_page(rows, generation),
+                    lambda error: self.page_failed(generation))
+
+    def add_page(self, rows, generation):
+        """Добавить загруженную страницу"""
+        if generation != self.generation:
+            return
+        self.loading = False
+        key = self.last_key
+        if key is None and self.start_id is not None and rows:
+            key = self.start_key = self.row_key(rows[0])  # первая страница включает начальную строку
+        if rows:
+            self.last_key = self.row_key(rows[-1])
+            self.append_rows(rows)
+        if len(rows) < self.page_size:
+            if key_segment_limited(key, self.descending):
+                # Участок ключа закончился, дальше - строки второго участка
+                self.last_key = SEGMENT_BOUNDARY
+                self.fetchMore()
+            else:
+                self.exhausted = True
+
+    def row_key(self, values):
+        """Ключ keyset-пагинации для строки"""
+        if self.sort_column == 0:
+            return values[0]
+        return (values[self.sort_column], values[0])
+
+    def page_failed(self, generation):
+        """Остановить подгрузку после ошибки запроса"""
+        if generation == self.generation:
+            self.loading = False
+            self.exhausted = True
+
+
+class PagedReport:
+    """Текстовый отчет: шапка и детальная часть, показываемая постранично
+
+    Шапка формируется один раз, строки детальной части форматируются функцией
+    format_row только для отображаемой страницы и пишутся в io.StringIO.
+    """
+
+    def __init__(self, header, rows=(), format_row=str, page_size=REPORT_PAGE_SIZE):
+        self.header = header
+        self.rows = rows
+        self.format_row = format_row
+        self.page_size = page_size
+
+    def page_count(self):
+        """Количество страниц (не меньше одной)"""
+        return max(1, -(-len(self.rows) // self.page_size))
+
+    def render(self, page):
+        """Текст страницы page (с нуля)"""
+        out = io.StringIO()
+        out.write(self.header)
+        first = page * self.page_size
+        for row in self.rows[first:first + self.page_size]:
+            out.write(self.format_row(row))
+            out.write("\n")
+        return out.getvalue()
+
+    def write(self, out):
+        """Записать отчет целиком (все страницы) в текстовый файл out"""
+        out.write(self.header)
+        for row in self.rows:
+            out.write(self.format_row(row))
+            out.write("\n")
+
+
+# Построение текстовых отчетов по строкам запросов (используется окном и
+# пакетным формированием отчетов без GUI)
+
+def format_money(value):
+    """Сумма в рублях с двумя знаками; NULL (нет зарплат в отделе) - прочерк"""
+    return "—" if value is None else f"{value:.2f}"
+
+
+def department_stats_report(rows):
+    """Статистика по отделам (строки DEPARTMENT_STATS_QUERY)"""
+    return PagedReport(
+        "Статистика по отделам:\n" + "="*50 + "\n", rows,
+        lambda row: (f"Отдел: {row[0]}\n"
+                     f"  Сотрудников: {row[1]}\n"
+                     f"  Средняя зарплата: {format_money(row[2])} руб.\n" + "-"*30))
+
+
+def high_salary_report(rows):
+    """Сотрудники с зарплатой выше средней (строки HIGH_SALARY_QUERY)"""
+    return PagedReport("Сотрудники с зарплатой выше средней:\n" + "="*50 + "\n", rows,
+                       lambda row: f"{row[0]} - {row[1]} - {format_money(row[2])} руб.")
+
+
+def department_report(rows):
+    """Отчет по отделам (строки DEPARTMENT_REPORT_QUERY)"""
+    def format_department(row):
+        return (f"ОТДЕЛ: {row[0]}\n"
+                f"  Всего сотрудников: {row[1]}\n"
+                f"  Минимальная зарплата: {format_money(row[2])} руб.\n"
+                f"  Максимальная зарплата: {format_money(row[3])} руб.\n"
+                f"  Средняя зарплата: {format_money(row[4])} руб.\n" + "-"*40)
+    
+    return PagedReport("ОТЧЕТ ПО ОТДЕЛАМ\n" + "="*60 + "\n\n", rows,
+                       format_department, page_size=REPORT_PAGE_SIZE // 6)
+
+
+def salary_report(rows):
+    """Отчет по зарплатам (строки SALARY_REPORT_QUERY)"""
+    # Категории считаются по колонке за один проход
+    categories = Counter(result_columns(rows, 5)[4])
+    
+    header = io.StringIO()
+    header.write("ОТЧЕТ ПО ЗАРПЛАТАМ\n" + "="*60 + "\n\n")
+    header.write("Распределение по категориям:\n")
+    header.write(f"  Высокая зарплата: {categories['Высокая']} сотрудников\n")
+    header.write(f"  Средняя зарплата: {categories['Средняя']} сотрудников\n")
+    header.write(f"  Низкая зарплата: {categories['Низкая']} сотрудников\n")
+    header.write("\n" + "="*60 + "\n\n")
+    header.write("Детальная информация:\n")
+    header.write("-"*60 + "\n")
+    
+    return PagedReport(header.getvalue(), rows,
+                       lambda row: f"{row[0]} ({row[1]}) - {row[2]} - {format_money(row[3])} руб. [{row[4]}]")
+
+
+def distribution_report(distribution):
+    """Отчет о распределении зарплат (результат salary_distribution)"""
+    lines = ["РАСПРЕДЕЛЕНИЕ ЗАРПЛАТ", "="*60, ""]
+    if not distribution['total']:
+        lines.append("Нет сотрудников с указанной зарплатой")
+        return PagedReport("\n".join(lines))
+    
+    percent_titles = ["Медиана" if p == 50 else f"P{p}" for p in SALARY_PERCENTILES]
+    lines.append(f"Сотрудников с зарплатой: {distribution['total']}")
+    lines.append(f"Диапазон: {distribution['low']:.2f} - {distribution['high']:.2f} руб.")
+    lines.append("  ".join(f"{title}: {value:.2f}"
+                           for title, value in zip(percent_titles, distribution['overall'])))
+    lines += ["", f"Гистограмма ({len(distribution['bins'])} интервалов):", "-"*60]
+    
+    largest = max(count for _, _, count in distribution['bins'])
+    for low, high, count in distribution['bins']:
+        bar = "█" * round(30 * count / largest) if largest else ""
+        lines.append(f"{low:>10.0f} - {high:<10.0f} {count:>7} {bar}")
+    
+    lines += ["", "Перцентили по отделам:", "-"*60,
+              f"{'Отдел':<20}{'Сотр.':>7}" + "".join(f"{title:>11}" for title in percent_titles)]
+    for department, count, *values in distribution['departments']:
+        lines.append(f"{str(department):<20}{count:>7}" + "".join(f"{value:>11.2f}" for value in values))
+    return PagedReport("\n".join(lines))
+
+
+# Пакетное формирование отчетов без GUI
+
+# Версия схемы, с которой есть таблица department_stats (см. MIGRATIONS)
+DEPARTMENT_STATS_VERSION = 3
+
+# Те же запросы с агрегатами по employees - для баз до миграции 3: пакетный
+# режим открывает базы только для чтения и миграции не применяет
+AGGREGATE_QUERIES = {
+    DEPARTMENT_STATS_QUERY: """
+        SELECT department, COUNT(*) as count, AVG(salary) as avg_salary
+        FROM employees
+        GROUP BY department
+        ORDER BY department
+    """,
+    HIGH_SALARY_QUERY: """
+        SELECT name, position, salary
+        FROM employees
+        WHERE salary > (SELECT AVG(salary) FROM employees)
+        ORDER BY salary DESC
+    """,
+    DEPARTMENT_REPORT_QUERY: """
+        SELECT department,
+               COUNT(*) as total_employees,
+               MIN(salary) as min_salary,
+               MAX(salary) as max_salary,
+               AVG(salary) as avg_salary
+        FROM employees
+        GROUP BY department
+        ORDER BY avg_salary DESC
+    """,
+}
+
+
+def fetch_report_rows(conn, query):
+    """Строки запроса отчета; без department_stats - по агрегатам employees"""
+    if DatabaseManager.schema_version(conn) < DEPARTMENT_STATS_VERSION:
+        query = AGGREGATE_QUERIES.get(query, query)
+    return conn.execute(query).fetchall()
+
+
+# Отчеты пакетного режима: имя -> функция conn, bins -> PagedReport
+BATCH_REPORTS = {
+    'department_stats': lambda conn, bins: department_stats_report(
+        fetch_report_rows(conn, DEPARTMENT_STATS_QUERY)),
+    'high_salary': lambda conn, bins: high_salary_report(fetch_report_rows(conn, HIGH_SALARY_QUERY)),
+    'departments': lambda conn, bins: department_report(fetch_report_rows(conn, DEPARTMENT_REPORT_QUERY)),
+    'salaries': lambda conn, bins: salary_report(fetch_report_rows(conn, SALARY_REPORT_QUERY)),
+    'distribution': lambda conn, bins: distribution_report(salary_distribution(conn, bins)),
+}
+
+
+def write_file_reports(db_path, output_dir, names=tuple(BATCH_REPORTS), bins=DEFAULT_SALARY_BINS):
+    """Сформировать отчеты одной базы в output_dir (выполняется в процессе пула)
+
+    База открывается только для чтения, миграции не применяются (для старых
+    схем см. fetch_report_rows). Любая ошибка отчета записывается в его итоги
+    и не прерывает остальные отчеты файла. Возвращает итоги с временем запроса и записи каждого отчета.
+    """
+    started = time.perf_counter()
+    summary = {'database': db_path, 'output_dir': output_dir, 'reports': [], 'error': None}
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        summary['error'] = str(e)
+        summary['total_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return summary
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in names:
+            entry = {'report': name, 'file': os.path.join(output_dir, f"{name}.txt"), 'error': None}
+            query_started = time.perf_counter()
+            try:
+                report = BATCH_REPORTS[name](conn, bins)
+                entry['rows'] = len(report.rows)
+                write_started = time.perf_counter()
+                entry['query_ms'] = round((write_started - query_started) * 1000, 3)
+                with open(entry['file'], 'w', encoding='utf-8') as f:
+                    report.write(f)
+                entry['write_ms'] = round((time.perf_counter() - write_started) * 1000, 3)
+            except Exception as e:
+                entry['error'] = str(e) or type(e).__name__
+            summary['reports'].append(entry)
+    finally:
+        conn.close()
+    summary['total_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return summary
+
+
+def report_output_dirs(db_paths, report_dir):
+    """Каталог отчетов для каждой базы: имя файла без расширения, с номером при повторе"""
+    dirs, used = [], set()
+    for path in db_paths:
+        stem = os.path.splitext(os.path.basename(path))[0] or "database"
+        name, number = stem, 1
+        while name in used:
+            number += 1
+            name = f"{stem}_{number}"
+        used.add(name)
+        dirs.append(os.path.join(report_dir, name))
+    return dirs
+
+
+def run_batch_reports(db_paths, report_dir, names=tuple(BATCH_REPORTS), jobs=None,
+                      bins=DEFAULT_SALARY_BINS):
+    """Отчеты по списку баз в пуле процессов; итоги пишутся в report_dir/summary.json
+
+    Возвращает код завершения: 0 - все отчеты сформированы, 1 - были ошибки.
+    """
+    started = time.perf_counter()
+    os.makedirs(report_dir, exist_ok=True)
+    summaries = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(write_file_reports, path, output_dir, tuple(names), bins):
+                   (path, output_dir)
+                   for path, output_dir in zip(db_paths, report_output_dirs(db_paths, report_dir))}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # Сбой процесса пула или ошибка вне отчетов - ошибка этой базы
+                path, output_dir = futures[future]
+                summary = {'database': path, 'output_dir': output_dir, 'reports': [],
+                           'error': str(e) or type(e).__name__, 'total_ms': 0.0}
+            summaries.append(summary)
+            failed = [entry for entry in summary['reports'] if entry['error']]
+            status = summary['error'] or (f"ошибок: {len(failed)}" if failed else "готово")
+            print(f"{summary['database']}: {summary['total_ms']:.1f} мс, {status}")
+            for entry in summary['reports']:
+                if entry['error']:
+                    print(f"  {entry['report']}: {entry['error']}")
+                else:
+                    print(f"  {entry['report']:<18}строк {entry['rows']:>9}  запрос {entry['query_ms']:>9.1f} мс"
+                          f"  запись {entry['write_ms']:>9.1f} мс")
+    
+    # Итоги в порядке баз из командной строки
+    order = {path: index for index, path in enumerate(db_paths)}
+    summaries.sort(key=lambda summary: order[summary['database']])
+    total_ms = round((time.perf_counter() - started) * 1000, 3)
+    with open(os.path.join(report_dir, "summary.json"), 'w', encoding='utf-8') as f:
+        json.dump({'total_ms': total_ms, 'jobs': jobs, 'databases': summaries}, f,
+                  ensure_ascii=False, indent=1)
+    
+    failed = sum(1 for summary in summaries
+                 if summary['error'] or any(entry['error'] for entry in summary['reports']))
+    print(f"Баз: {len(summaries)}, с ошибками: {failed}, всего {total_ms / 1000:.2f} с")
+    return 1 if failed else 0
+
+
+def draw_salary_chart(figure, data):
+    """График средней зарплаты по отделам (строки SALARY_CHART_QUERY)"""
+    departments, avg_salaries = result_columns(data, 2)
+    
+    ax = figure.add_subplot(111)
+    bars = ax.bar(departments, avg_salaries, color='skyblue', alpha=0.7)
+    ax.set_xlabel('Отдел')
+    ax.set_ylabel('Средняя зарплата (руб.)')
+    ax.set_title('Средняя зарплата по отделам')
+    
+    # Добавляем значения на столбцы
+    for bar, salary in zip(bars, avg_salaries):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1000,
+               f'{salary:.0f}', ha='center', va='bottom')
+    
+    # Поворачиваем подписи отделов для лучшей читаемости
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_ha('right')
+
+
+def draw_pie_chart(figure, data):
+    """Круговая диаграмма распределения по отделам (строки PIE_CHART_QUERY)"""
+    departments, counts = result_columns(data, 2)
+    
+    from matplotlib import cm
+    
+    ax = figure.add_subplot(111)
+    colors = cm.Set3(range(len(departments)))
+    wedges, texts, autotexts = ax.pie(counts, labels=departments, autopct='%1.1f%%',
+                                      colors=colors, startangle=90)
+    ax.set_title('Распределение сотрудников по отделам')
+    
+    # Улучшаем читаемость текста
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+
+def draw_hire_chart(figure, data):
+    """График динамики найма (строки HIRE_CHART_QUERY)"""
+    # Даты переводятся в date: строки matplotlib выводит категориями с подписью
+    # у каждой точки, что на тысячах дат занимает десятки секунд
+    dates, counts = [], []
+    for hire_date, count in zip(*result_columns(data, 2)):
+        try:
+            dates.append(datetime.date.fromisoformat(hire_date))
+        except (TypeError, ValueError):
+            continue
+        counts.append(count)
+    
+    ax = figure.add_subplot(111)
+    ax.plot(dates, counts, marker='o' if len(dates) <= 100 else None,
+            linewidth=2, markersize=8, color='green')
+    ax.set_xlabel('Дата найма')
+    ax.set_ylabel('Количество сотрудников')
+    ax.set_title('Динамика найма сотрудников')
+    
+    # Поворачиваем подписи дат
+    figure.autofmt_xdate(rotation=45)
+    
+    # Добавляем сетку
+    ax.grid(True, alpha=0.3)
+
+
+def draw_salary_histogram(figure, distribution):
+    """Гистограмма по готовым интервалам распределения зарплат"""
+    lows = [low for low, _, _ in distribution['bins']]
+    counts = [count for _, _, count in distribution['bins']]
+    
+    ax = figure.add_subplot(111)
+    ax.bar(lows, counts, width=distribution['width'], align='edge',
+           color='steelblue', edgecolor='white', alpha=0.8)
+    for percent, value in zip(SALARY_PERCENTILES, distribution['overall']):
+        ax.axvline(value, linestyle='--', linewidth=1, color='darkred')
+        ax.text(value, max(counts), "Медиана" if percent == 50 else f"P{percent}",
+                rotation=90, va='top', ha='right', color='darkred')
+    ax.set_xlabel('Зарплата (руб.)')
+    ax.set_ylabel('Количество сотрудников')
+    ax.set_title('Распределение зарплат')
+    ax.grid(True, axis='y', alpha=0.3)
+
+
+def load_matplotlib():
+    """Импорт matplotlib с холстом Agg; False - если библиотека недоступна"""
+    global MATPLOTLIB_AVAILABLE
+    if MATPLOTLIB_AVAILABLE and "matplotlib.figure" not in sys.modules:
+        started = time.perf_counter()
+        try:
+            # Графики рисуются без pyplot на холсте Agg - это допустимо вне GUI потока
+            importlib.import_module("matplotlib.backends.backend_agg")
+            importlib.import_module("matplotlib.figure")
+        except ImportError as e:
+            print(f"Ошибка загрузки matplotlib: {e}")
+            MATPLOTLIB_AVAILABLE = False
+        else:
+            print(f"matplotlib загружен за {(time.perf_counter() - started) * 1000:.0f} мс")
+    return MATPLOTLIB_AVAILABLE
+
+
+class ChartSignals(QObject):
+    """Сигналы задачи отрисовки графика"""
+    finished = pyqtSignal(QImage)
+    error = pyqtSignal(str)
+
+
+class ChartRenderJob(QRunnable):
+    """Отрисовка графика в фоновом потоке на холсте Agg
+
+    draw(figure, data) строит график на новой фигуре размером width x height
+    (логические пиксели), результат - QImage с учетом device pixel ratio.
+    """
+
+    def __init__(self, draw, data, width, height, ratio=1.0, dpi=100):
+        super().__init__()
+        self.draw = draw
+        self.data = data
+        self.width = max(width, 200)
+        self.height = max(height, 150)
+        self.ratio = ratio
+        self.dpi = dpi
+        self.setAutoDelete(False)
+        self.signals = ChartSignals()
+
+    def run(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        try:
+            figure = Figure(figsize=(self.width / self.dpi, self.height / self.dpi),
+                            dpi=self.dpi * self.ratio)
+            canvas = FigureCanvasAgg(figure)
+            self.draw(figure, self.data)
+            figure.tight_layout()
+            canvas.draw()
+            width, height = canvas.get_width_height()
+            image = QImage(canvas.buffer_rgba(), width, height, QImage.Format_RGBA8888).copy()
+            image.setDevicePixelRatio(self.ratio)
+            self.signals.finished.emit(image)
+        except Exception as e:
+            print(f"Ошибка отрисовки графика: {e}")
+            self.signals.error.emit(str(e))
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Делегат, рисующий кнопку в ячейке без создания виджета на каждую строку
+
+    Кнопка только отрисовывается стилем; нажатие и отпускание мыши в одной
+    ячейке обрабатываются в editorEvent и сообщаются сигналом clicked.
+    """
+
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.pressed = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = self.text
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self.pressed = (index.row(), index.column())
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            was_pressed = self.pressed == (index.row(), index.column())
+            self.pressed = None
+            if was_pressed and option.rect.contains(event.pos()):
+                self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class QueryLogDialog(QDialog):
+    """Журнал замеров запросов с планом выполнения выбранного запроса
+
+    План получается через EXPLAIN QUERY PLAN с параметрами из журнала,
+    сам запрос при этом не выполняется.
+    """
+
+    HEADERS = ["Время", "Источник", "Тип", "Строк", "КБ", "Очередь", "Выполнение",
+               "Выборка", "Доставка", "Интерфейс", "Всего, мс", "Запрос"]
+
+    def __init__(self, query_log, parent=None, db_path=DB_PATH):
+        super().__init__(parent)
+        self.setWindowTitle("Журнал запросов")
+        self.resize(1100, 600)
+        self.query_log = query_log
+        self.db_path = db_path
+        self.timings = []
+        
+        layout = QVBoxLayout(self)
+        
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("🔄 Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        clear_btn = QPushButton("🗑️ Очистить")
+        clear_btn.clicked.connect(self.clear)
+        self.summary_label = QLabel()
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addWidget(clear_btn)
+        btn_layout.addWidget(self.summary_label)
+        btn_layout.addStretch()
+        
+        # Первая скрытая колонка - номер записи в self.timings
+        self.model = EmployeeTableModel(self.HEADERS, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.selectionModel().currentRowChanged.connect(self.show_plan)
+        
+        self.plan_text = QTextEdit()
+        self.plan_text.setReadOnly(True)
+        self.plan_text.setFont(QFont("Courier", 10))
+        
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.plan_text)
+        splitter.setSizes([400, 200])
+        
+        layout.addLayout(btn_layout)
+        layout.addWidget(splitter)
+        
+    def refresh(self):
+        """Перечитать журнал (новые запросы сверху)"""
+        self.timings = self.query_log.entries()[::-1]
+        rows = []
+        for index, timing in enumerate(self.timings):
+            moment = datetime.datetime.fromtimestamp(timing.timestamp).strftime('%H:%M:%S')
+            kind = timing.kind + (", кэш" if timing.cached else "") + (", ошибка" if timing.error else "")
+            rows.append((index, moment, timing.source or "", kind, timing.rows,
+                         round(timing.bytes / 1024, 1),
+                         *(round(getattr(timing, phase) * 1000, 2) for phase in QueryTiming.PHASES),
+                         round(timing.total() * 1000, 2), " ".join(timing.sql.split())))
+        self.model.set_rows(rows, hidden=1)
+        self.summary_label.setText(
+            f"Запросов: {len(rows)}, медленных (≥ {self.query_log.slow_ms} мс): "
+            f"{self.query_log.slow_count}" +
+            (f", журнал: {self.query_log.path}" if self.query_log.path else ""))
+        self.plan_text.clear()
+        
+    def clear(self):
+        self.query_log.clear()
+        self.refresh()
+        
+    def show_plan(self, current, previous=None):
+        """План выполнения выбранного запроса"""
+        if not current.isValid():
+            return
+        timing = self.timings[self.model.value(current.row(), 0)]
+        text = f"{timing.sql.strip()}\n\nПараметры: {timing.params}\n"
+        if timing.error:
+            text += f"Ошибка: {timing.error}\n"
+        text += "\nEXPLAIN QUERY PLAN:\n"
+        if not timing.explainable:
+            text += "  недоступно для составной операции\n"
+        else:
+            try:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    details = DatabaseManager.explain_query_plan(conn, timing.sql, timing.params)
+                finally:
+                    conn.close()
+                text += "".join(f"  {detail}\n" for detail in details)
+            except sqlite3.Error as e:
+                text += f"  недоступно: {e}\n"
+        self.plan_text.setPlainText(text)
 
 
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
     
-    def __init__(self):
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, profile=False):
         super().__init__()
         self.setWindowTitle("PyQt5 Database Application")
         self.setGeometry(100, 100, 1200, 800)
         
-        # Хранилище для активных потоков
+        # Хранилище для активных задач
         self.active_workers = []
         
+        # Текущие потоковые запросы вкладок (порции от прежних запросов отбрасываются
+        # по номеру запроса)
+        self.request_counter = 0
+        self.table_stream = None
+        self.filter_stream = None
+        
+        # Запросы, результат которых показан на вкладках: вкладка -> (SQL, параметры, заголовки)
+        self.view_queries = {}
+        # Сортировка таблиц: вкладка -> (заголовок колонки, по убыванию)
+        self.sort_state = {}
+        self.export_worker = None
+        # Снимок employees для аналитики в памяти (NumPy), включается в меню
+        self.snapshot = None
+        self.snapshot_job = None
+        self.snapshot_stale = False
+        # Готовые изображения графиков: (тип, поколение данных, размер, ...) -> QImage
+        self.chart_images = OrderedDict()
+        self.chart_request = None
+        self.chart_jobs = set()
+        # matplotlib не потокобезопасен (общие кэши шрифтов и текста), поэтому
+        # графики рисуются по одному в отдельном пуле из одного потока
+        self.chart_pool = QThreadPool(self)
+        self.chart_pool.setMaxThreadCount(1)
+        self.import_worker = None
+        # Вкладки строятся при первом показе: вкладка -> функция построения
+        self.tab_builders = {}
+        # Вывод времени построения вкладок (--profile-startup)
+        self.profile = profile
+        
         # Инициализация базы данных
         DatabaseManager.init_database()
+        self.fts_mode = DatabaseManager.fts_mode(DB_PATH)
+        
+        # Пул потоков с постоянными подключениями к БД
+        self.db_pool = ConnectionPool(DB_PATH, pool_size)
+        
+        # Кэш результатов отчетов и графиков
+        self.query_cache = QueryCache(QUERY_CACHE_BUDGET)
+        
+        # Замеры последних запросов и журнал медленных запросов
+        self.query_log = QueryLog()
+        self.query_log_dialog = None
+        
+        # Поток записи с групповой фиксацией
+        self.db_writer = DatabaseWriter(DB_PATH, self.query_cache)
+        self.db_writer.start()
         
         # Настройка интерфейса
         self.setup_ui()
@@ -137,39 +2840,76 @@ class MainWindow(QMainWindow):
         # Тест подключения к БД
         self.test_database_connection()
         
-    def create_worker(self, query, params=None, is_write_operation=False):
-        """Безопасное создание рабочего потока"""
-        worker = DatabaseWorker(query, params, is_write_operation)
-        
-        # Добавляем в список активных потоков
+    def create_worker(self, query, params=None, is_write_operation=False, chunk_size=None,
+                      cacheable=False, source=None):
+        """Создание задачи для пула подключений (запись - для потока записи)
+
+        source - действие, запустившее запрос; им запрос подписывается в журнале.
+        """
+        # Кэш используется для помеченных запросов чтения и сбрасывается любой записью
+        cache = self.query_cache if (cacheable or is_write_operation) else None
+        if is_write_operation:
+            worker = self.db_writer.operation(query, params)
+        else:
+            worker = DatabaseWorker(query, params, pool=self.db_pool,
+                                    chunk_size=chunk_size, cache=cache)
+        self.request_counter += 1
+        worker.request_id = worker.signals.request_id = self.request_counter
+        timing = worker.timing
+        timing.source = source
+        
+        # Добавляем в список активных задач
         self.active_workers.append(worker)
         
-        # Автоматически удаляем поток после завершения
-        worker.finished.connect(lambda: self.remove_from_active_list(worker))
-        worker.error.connect(lambda: self.remove_from_active_list(worker))
+        # Замер доставки: этот слот подключен первым и вызывается раньше
+        # обработчиков результата, released приходит после всех них
+        for signal in (worker.finished, worker.done, worker.error):
+            signal.connect(lambda *args: timing.deliver())
+        # Время обработчиков порций: начало здесь, конец - в DatabaseWorker.start
+        worker.chunk.connect(lambda rows: timing.chunk_received())
+        worker.signals.released.connect(lambda: self.record_timing(timing))
+        
+        # Автоматически удаляем задачу после завершения. Не по finished/error:
+        # слот, выполненный раньше остальных, удалил бы сигналы до того, как поток
+        # задачи поставит в очередь вызовы следующих слотов (lambda терялись)
+        worker.signals.released.connect(lambda: self.remove_from_active_list(worker))
+        if cache is not None:
+            worker.finished.connect(self.update_cache_label)
         
         return worker
         
+    def record_timing(self, timing):
+        """Завершить замеры запроса после заполнения интерфейса и добавить их в журнал"""
+        timing.complete()
+        self.query_log.add(timing)
+        
     def remove_from_active_list(self, worker):
-        """Удаляем поток из списка активных"""
+        """Удаляем задачу из списка активных"""
         if worker in self.active_workers:
             self.active_workers.remove(worker)
-        # Планируем удаление объекта
-        worker.deleteLater()
+        # Планируем удаление объекта сигналов
+        worker.signals.deleteLater()
         
     def closeEvent(self, event):
-        """Корректное завершение всех потоков при закрытии приложения"""
-        # Ждем завершения всех активных потоков
-        for worker in self.active_workers:
-            if worker.isRunning():
-                worker.quit()
-                worker.wait(1000)  # Ждем до 1 секунды
-        
+        """Корректное завершение пула при закрытии приложения"""
         reply = QMessageBox.question(self, 'Подтверждение', 
                                    'Вы уверены, что хотите выйти?',
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
+            # Останавливаем импорт, ждем завершения активных задач и закрываем подключения
+            self.cancel_import()
+            if self.export_worker is not None:
+                self.export_worker.cancel()
+            if self.snapshot_job is not None:
+                self.snapshot_job.cancel()
+            # Запросы чтения прерываются, чтобы не закрыть подключение посреди выборки
+            for worker in self.active_workers:
+                if isinstance(worker, DatabaseWorker):
+                    worker.cancel()
+            self.chart_pool.waitForDone()
+            self.db_writer.stop()
+            self.db_pool.close()
             event.accept()
         else:
             event.ignore()
@@ -224,52 +2964,95 @@ class MainWindow(QMainWindow):
         return group
         
     def setup_tabs(self):
-        """Настройка вкладок"""
-        # Tab 1 - Таблица сотрудников
-        self.tab1 = QWidget()
-        self.setup_tab1()
-        self.tab_widget.addTab(self.tab1, "📋 Сотрудники")
+        """Настройка вкладок
+
+        Вкладки добавляются пустыми, содержимое строится при первом показе
+        (ensure_tab) - запуск не ждет виджетов, запросов и matplotlib,
+        которые могут не понадобиться.
+        """
+        self.tab1 = QWidget()  # Таблица сотрудников
+        self.tab2 = QWidget()  # Статистика
+        self.tab3 = QWidget()  # Фильтры
+        self.tab4 = QWidget()  # Графики
+        self.tab5 = QWidget()  # Отчеты
+        self.tab6 = QWidget()  # Редактирование
+        self.tab_builders = {
+            self.tab1: self.setup_tab1,
+            self.tab2: self.setup_tab2,
+            self.tab3: self.setup_tab3,
+            self.tab4: self.setup_tab4,
+            self.tab5: self.setup_tab5,
+            self.tab6: self.setup_tab6,
+        }
         
-        # Tab 2 - Статистика
-        self.tab2 = QWidget()
-        self.setup_tab2()
+        self.tab_widget.addTab(self.tab1, "📋 Сотрудники")
         self.tab_widget.addTab(self.tab2, "📊 Статистика")
-        
-        # Tab 3 - Фильтры
-        self.tab3 = QWidget()
-        self.setup_tab3()
         self.tab_widget.addTab(self.tab3, "🔍 Поиск и фильтры")
-        
-        # Tab 4 - Графики
-        self.tab4 = QWidget()
-        self.setup_tab4()
         self.tab_widget.addTab(self.tab4, "📈 Графики")
-        
-        # Tab 5 - Отчеты
-        self.tab5 = QWidget()
-        self.setup_tab5()
         self.tab_widget.addTab(self.tab5, "📄 Отчеты")
-        
-        # Tab 6 - Редактирование
-        self.tab6 = QWidget()
-        self.setup_tab6()
         self.tab_widget.addTab(self.tab6, "✏️ Редактирование")
         
+        # Таблица сотрудников нужна верхней панели, поэтому строится сразу
+        self.ensure_tab(self.tab1)
+        self.tab_widget.currentChanged.connect(
+            lambda index: self.ensure_tab(self.tab_widget.widget(index)))
+        
+    def ensure_tab(self, tab):
+        """Построить содержимое вкладки, если оно еще не построено"""
+        setup = self.tab_builders.pop(tab, None)
+        if setup is None:
+            return
+        started = time.perf_counter()
+        setup()
+        if self.profile:
+            title = self.tab_widget.tabText(self.tab_widget.indexOf(tab))
+            print(f"Вкладка {title} построена за {(time.perf_counter() - started) * 1000:.1f} мс")
+        
+    def is_tab_built(self, tab):
+        """Построено ли содержимое вкладки"""
+        return tab not in self.tab_builders
+        
     def setup_tab1(self):
         """Настройка Tab1 - Таблица сотрудников"""
         layout = QVBoxLayout(self.tab1)
         
+        # Панель постраничного просмотра
+        paging_layout = QHBoxLayout()
+        
+        self.paged_check = QCheckBox("Постраничный просмотр")
+        
+        self.page_size_spin = QSpinBox()
+        self.page_size_spin.setRange(50, 100000)
+        self.page_size_spin.setSingleStep(100)
+        self.page_size_spin.setValue(DEFAULT_PAGE_SIZE)
+        self.page_size_spin.valueChanged.connect(self.on_page_size_changed)
+        
+        self.jump_id_spin = QSpinBox()
+        self.jump_id_spin.setRange(1, 2**31 - 1)
+        
+        jump_btn = QPushButton("Перейти")
+        jump_btn.clicked.connect(self.jump_to_id)
+        
+        paging_layout.addWidget(self.paged_check)
+        paging_layout.addWidget(QLabel("Размер страницы:"))
+        paging_layout.addWidget(self.page_size_spin)
+        paging_layout.addWidget(QLabel("Перейти к ID:"))
+        paging_layout.addWidget(self.jump_id_spin)
+        paging_layout.addWidget(jump_btn)
+        paging_layout.addStretch()
+        
         # Таблица для отображения данных
-        self.table_widget = QTableWidget()
-        self.table_widget.setColumnCount(6)
-        self.table_widget.setHorizontalHeaderLabels([
-            "ID", "Имя", "Должность", "Отдел", "Зарплата", "Дата найма"
-        ])
+        self.table_model = EmployeeTableModel(EMPLOYEE_HEADERS, self)
+        self.paged_model = PagedEmployeeModel(self.load_employee_page, EMPLOYEE_HEADERS, self)
+        self.table_widget = QTableView()
+        self.table_widget.setModel(self.table_model)
         
         # Настройка заголовков
         header = self.table_widget.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
+        self.enable_server_sort(self.tab1, self.table_widget, self.execute_query1)
         
+        layout.addLayout(paging_layout)
         layout.addWidget(self.table_widget)
         
     def setup_tab2(self):
@@ -309,14 +3092,21 @@ class MainWindow(QMainWindow):
         apply_filter_btn.clicked.connect(self.apply_filters)
         layout.addWidget(apply_filter_btn, 3, 0, 1, 2)
         
+        # Фильтрация при вводе: запрос запускается после паузы в наборе
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        for filter_edit in (self.name_filter, self.dept_filter, self.min_salary):
+            filter_edit.textChanged.connect(self.filter_timer.start)
+        
         # Таблица для отфильтрованных результатов
-        self.filter_table = QTableWidget()
-        self.filter_table.setColumnCount(6)
-        self.filter_table.setHorizontalHeaderLabels([
-            "ID", "Имя", "Должность", "Отдел", "Зарплата", "Дата найма"
-        ])
+        self.filter_model = EmployeeTableModel(EMPLOYEE_HEADERS, self)
+        self.filter_table = QTableView()
+        self.filter_table.setModel(self.filter_model)
         header = self.filter_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
+        self.enable_server_sort(self.tab3, self.filter_table, self.apply_filters)
         layout.addWidget(self.filter_table, 4, 0, 1, 2)
         
     def setup_tab5(self):
@@ -337,19 +3127,46 @@ class MainWindow(QMainWindow):
         report2_btn = QPushButton("Отчет по зарплатам")
         report2_btn.clicked.connect(self.generate_salary_report)
         
+        report3_btn = QPushButton("Распределение зарплат")
+        report3_btn.clicked.connect(self.generate_distribution_report)
+        
+        # Число интервалов гистограммы (отчет о распределении и график)
+        self.bins_spin = QSpinBox()
+        self.bins_spin.setRange(2, 100)
+        self.bins_spin.setValue(DEFAULT_SALARY_BINS)
+        
         btn_layout.addWidget(report1_btn)
         btn_layout.addWidget(report2_btn)
+        btn_layout.addWidget(report3_btn)
+        btn_layout.addWidget(QLabel("Интервалов:"))
+        btn_layout.addWidget(self.bins_spin)
         btn_layout.addStretch()
         
+        # Переход по страницам детальной части отчета
+        self.report = None
+        self.report_page = 0
+        page_layout = QHBoxLayout()
+        self.report_prev_btn = QPushButton("◀ Назад")
+        self.report_prev_btn.clicked.connect(lambda: self.show_report_page(self.report_page - 1))
+        self.report_next_btn = QPushButton("Вперед ▶")
+        self.report_next_btn.clicked.connect(lambda: self.show_report_page(self.report_page + 1))
+        self.report_page_label = QLabel("")
+        page_layout.addStretch()
+        page_layout.addWidget(self.report_prev_btn)
+        page_layout.addWidget(self.report_page_label)
+        page_layout.addWidget(self.report_next_btn)
+        
         layout.addLayout(btn_layout)
         layout.addWidget(QLabel("Сгенерированные отчеты:"))
         layout.addWidget(self.reports_text)
+        layout.addLayout(page_layout)
+        self.show_report(PagedReport(""))
         
     def setup_tab4(self):
         """Настройка Tab4 - Графики"""
         layout = QVBoxLayout(self.tab4)
         
-        if not MATPLOTLIB_AVAILABLE:
+        if not load_matplotlib():
             # Сообщение если matplotlib не установлен
             no_charts_text = QTextEdit()
             no_charts_text.setReadOnly(True)
@@ -359,9 +3176,12 @@ class MainWindow(QMainWindow):
             layout.addWidget(no_charts_text)
             return
         
-        # Создаем виджет для графиков
-        self.figure = Figure(figsize=(12, 8))
-        self.canvas = FigureCanvas(self.figure)
+        # Графики рисуются в фоне и выводятся готовым изображением
+        self.chart_label = QLabel()
+        self.chart_label.setAlignment(Qt.AlignCenter)
+        self.chart_label.setMinimumSize(400, 300)
+        # Размер области задает окно, а не текущее изображение
+        self.chart_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         
         # Кнопки для разных графиков
         btn_layout = QHBoxLayout()
@@ -375,13 +3195,17 @@ class MainWindow(QMainWindow):
         btn_hire_chart = QPushButton("📅 Динамика найма")
         btn_hire_chart.clicked.connect(self.show_hire_chart)
         
+        btn_histogram = QPushButton("📶 Гистограмма зарплат")
+        btn_histogram.clicked.connect(self.show_salary_histogram)
+        
         btn_layout.addWidget(btn_salary_chart)
         btn_layout.addWidget(btn_pie_chart)
         btn_layout.addWidget(btn_hire_chart)
+        btn_layout.addWidget(btn_histogram)
         btn_layout.addStretch()
         
         layout.addLayout(btn_layout)
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.chart_label, 1)
         
     def setup_tab6(self):
         """Настройка Tab6 - Редактирование"""
@@ -412,24 +3236,48 @@ class MainWindow(QMainWindow):
         clear_form_btn = QPushButton("🗑️ Очистить форму")
         clear_form_btn.clicked.connect(self.clear_edit_form)
         
+        self.import_btn = QPushButton("📥 Импорт из CSV")
+        self.import_btn.clicked.connect(self.import_csv)
+        
         form_btn_layout.addWidget(add_btn)
         form_btn_layout.addWidget(clear_form_btn)
+        form_btn_layout.addWidget(self.import_btn)
         form_btn_layout.addStretch()
         
         form_layout.addRow(form_btn_layout)
         
+        # Ход импорта из CSV
+        import_layout = QHBoxLayout()
+        self.import_progress = QProgressBar()
+        self.import_cancel_btn = QPushButton("Отменить импорт")
+        self.import_cancel_btn.clicked.connect(self.cancel_import)
+        import_layout.addWidget(self.import_progress)
+        import_layout.addWidget(self.import_cancel_btn)
+        self.import_progress.hide()
+        self.import_cancel_btn.hide()
+        
+        form_layout.addRow(import_layout)
+        
         # Таблица для редактирования
         table_group = QGroupBox("📋 Редактирование существующих данных")
         table_layout = QVBoxLayout(table_group)
         
-        self.edit_table = QTableWidget()
-        self.edit_table.setColumnCount(7)  # +1 для кнопки удаления
-        self.edit_table.setHorizontalHeaderLabels([
-            "ID", "Имя", "Должность", "Отдел", "Зарплата", "Дата найма", "Действия"
-        ])
+        # +1 колонка без данных для кнопки удаления
+        self.edit_model = EmployeeTableModel(EMPLOYEE_HEADERS + ["Действия"], self, extra_columns=1)
+        self.edit_table = QTableView()
+        self.edit_table.setModel(self.edit_model)
+        self.edit_table.setSelectionBehavior(QTableView.SelectRows)
+        self.edit_table.setSelectionMode(QTableView.ExtendedSelection)
+        
+        # Кнопка удаления рисуется делегатом - без виджета на каждую строку
+        self.delete_delegate = ButtonDelegate("🗑️ Удалить", self.edit_table)
+        self.delete_delegate.clicked.connect(
+            lambda index: self.delete_employee(self.edit_model.value(index.row(), 0)))
+        self.edit_table.setItemDelegateForColumn(6, self.delete_delegate)
         
         header = self.edit_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
+        self.enable_server_sort(self.tab6, self.edit_table, self.refresh_edit_table)
         
         # Кнопки для таблицы
         table_btn_layout = QHBoxLayout()
@@ -461,6 +3309,11 @@ class MainWindow(QMainWindow):
         # Меню Файл
         file_menu = menubar.addMenu('Файл')
         
+        export_action = QAction('Экспорт текущего вида...', self)
+        export_action.setShortcut('Ctrl+E')
+        export_action.triggered.connect(self.export_current_view)
+        file_menu.addAction(export_action)
+        
         exit_action = QAction('Выход', self)
         exit_action.setShortcut('Ctrl+Q')
         exit_action.triggered.connect(self.close)
@@ -474,6 +3327,29 @@ class MainWindow(QMainWindow):
         refresh_action.triggered.connect(self.refresh_data)
         db_menu.addAction(refresh_action)
         
+        query_plans_action = QAction('Планы запросов (EXPLAIN QUERY PLAN)', self)
+        query_plans_action.triggered.connect(self.show_query_plans)
+        db_menu.addAction(query_plans_action)
+        
+        rebuild_stats_action = QAction('Пересчитать статистику отделов', self)
+        rebuild_stats_action.triggered.connect(self.rebuild_department_stats)
+        db_menu.addAction(rebuild_stats_action)
+        
+        self.snapshot_action = QAction('Аналитика в памяти (NumPy)', self)
+        self.snapshot_action.setCheckable(True)
+        self.snapshot_action.setEnabled(NUMPY_AVAILABLE)
+        self.snapshot_action.toggled.connect(self.toggle_snapshot)
+        db_menu.addAction(self.snapshot_action)
+        
+        query_log_action = QAction('Журнал запросов...', self)
+        query_log_action.setShortcut('Ctrl+L')
+        query_log_action.triggered.connect(self.show_query_log)
+        db_menu.addAction(query_log_action)
+        
+        pool_stats_action = QAction('Статистика пула подключений', self)
+        pool_stats_action.triggered.connect(self.show_pool_stats)
+        db_menu.addAction(pool_stats_action)
+        
         # Меню Справка
         help_menu = menubar.addMenu('Справка')
         
@@ -487,6 +3363,17 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Готов к работе")
         
+        # Счетчики кэша запросов
+        self.cache_label = QLabel()
+        self.status_bar.addPermanentWidget(self.cache_label)
+        self.update_cache_label()
+        
+    def update_cache_label(self):
+        """Обновление счетчиков кэша в статусбаре"""
+        stats = self.query_cache.stats()
+        self.cache_label.setText(f"Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                                 f"{stats['size_bytes'] / 1024:.0f} КБ")
+        
     def connect_signals(self):
         """Подключение сигналов к слотам"""
         self.bt1.clicked.connect(self.execute_query1)
@@ -499,36 +3386,46 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage("Выполнение запроса 1...")
         column = self.combo_columns.currentText()
         
-        if column == "Все поля":
-            query = "SELECT * FROM employees"
-        elif column == "Имя":
-            query = "SELECT name FROM employees"
-        elif column == "Должность":
-            query = "SELECT position FROM employees"
-        elif column == "Отдел":
-            query = "SELECT department FROM employees"
-        elif column == "Зарплата":
-            query = "SELECT salary FROM employees"
-        elif column == "Дата найма":
-            query = "SELECT hire_date FROM employees"
+        if self.paged_check.isChecked():
+            self.start_paged_browse()
+            return
+        
+        # Настраиваем колонки в зависимости от запроса и очищаем таблицу.
+        # При выводе одной колонки id загружается скрытым ключом - по нему
+        # строки убираются из таблицы после удаления сотрудников
+        field = COLUMN_FIELDS.get(column)
+        headers, hidden = ([column], 1) if field else (EMPLOYEE_HEADERS, 0)
+        self.display_data_in_table([], headers, hidden)
+        sort_field, self.table_model.sort_column, self.table_model.descending = \
+            self.view_sort(self.tab1, headers, hidden)
+        self.show_sort_indicator(self.tab1, self.table_widget)
+        order = order_by_clause(sort_field, self.table_model.descending)
+        if field:
+            query = f"SELECT id, {field} FROM employees" + order
+            self.view_queries[self.tab1] = (f"SELECT {field} FROM employees" + order, [], headers)
         else:
-            query = "SELECT * FROM employees"
+            query = "SELECT * FROM employees" + order
+            self.view_queries[self.tab1] = (query, [], headers)
             
-        self.worker = self.create_worker(query)
-        self.worker.finished.connect(self.on_query1_finished)
-        self.worker.error.connect(self.on_query_error)
+        self.cancel_stream(self.table_stream)
+        self.worker = self.create_worker(query, chunk_size=STREAM_CHUNK_SIZE,
+                                         source='execute_query1')
+        self.table_stream = self.worker
+        self.worker.chunk.connect(self.on_query1_chunk)
+        self.worker.done.connect(self.on_query1_finished)
+        self.worker.error.connect(self.on_query1_error)
         self.worker.start()
         
     def execute_query2(self):
         """Выполнение второго запроса"""
         self.status_bar.showMessage("Выполнение запроса 2...")
-        query = """
-        SELECT department, COUNT(*) as count, AVG(salary) as avg_salary 
-        FROM employees 
-        GROUP BY department
-        """
-        
-        self.worker = self.create_worker(query)
+        self.view_queries[self.tab2] = (DEPARTMENT_STATS_QUERY, [],
+                                        ["Отдел", "Сотрудников", "Средняя зарплата"])
+        if self.snapshot is not None:
+            self.on_query2_finished(self.snapshot.department_stats_rows())
+            return
+        self.worker = self.create_worker(DEPARTMENT_STATS_QUERY, cacheable=True,
+                                         source='execute_query2')
         self.worker.finished.connect(self.on_query2_finished)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
@@ -536,78 +3433,91 @@ class MainWindow(QMainWindow):
     def execute_query3(self):
         """Выполнение третьего запроса"""
         self.status_bar.showMessage("Выполнение запроса 3...")
-        query = """
-        SELECT name, position, salary 
-        FROM employees 
-        WHERE salary > (SELECT AVG(salary) FROM employees)
-        ORDER BY salary DESC
-        """
-        
-        self.worker = self.create_worker(query)
+        self.worker = self.create_worker(HIGH_SALARY_QUERY, source='execute_query3')
         self.worker.finished.connect(self.on_query3_finished)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
-    def on_query1_finished(self, result):
-        """Обработка результата запроса 1"""
-        # Очищаем старые данные перед отображением новых
-        self.table_widget.clearContents()
-        self.table_widget.setRowCount(0)
+    def cancel_stream(self, stream):
+        """Отменить потоковый запрос, если он еще выполняется"""
+        if stream is not None:
+            stream.cancel()
         
-        # Настраиваем колонки в зависимости от запроса
-        column = self.combo_columns.currentText()
-        if column == "Все поля":
-            self.table_widget.setColumnCount(6)
-            self.table_widget.setHorizontalHeaderLabels([
-                "ID", "Имя", "Должность", "Отдел", "Зарплата", "Дата найма"
-            ])
-        else:
-            self.table_widget.setColumnCount(1)
-            self.table_widget.setHorizontalHeaderLabels([column])
+    def is_current_stream(self, stream):
+        """Проверка, что сигнал пришел от актуального потокового запроса"""
+        request_id = getattr(self.sender(), 'request_id', None)
+        return stream is not None and request_id == stream.request_id
+        
+    def on_query1_chunk(self, rows):
+        """Обработка очередной порции результата запроса 1"""
+        if not self.is_current_stream(self.table_stream):
+            return
+        self.table_model.append_rows(rows)
+        self.status_bar.showMessage(f"Загрузка данных... Получено записей: {self.table_model.rowCount()}")
         
-        self.display_data_in_table(result)
-        self.status_bar.showMessage(f"Данные обновлены. Найдено записей: {len(result)}")
+    def on_query1_finished(self, total):
+        """Обработка завершения запроса 1"""
+        if not self.is_current_stream(self.table_stream):
+            return
+        self.table_stream = None
+        self.status_bar.showMessage(f"Данные обновлены. Найдено записей: {total}")
+        
+    def on_query1_error(self, error_msg):
+        """Ошибка запроса 1 (ошибки отмененных запросов не показываются)"""
+        if not self.is_current_stream(self.table_stream):
+            return
+        self.table_stream = None
+        self.on_query_error(error_msg)
         
     def on_query2_finished(self, result):
         """Обработка результата запроса 2"""
-        stats_text = "Статистика по отделам:\n" + "="*50 + "\n"
-        for row in result:
-            stats_text += f"Отдел: {row[0]}\n"
-            stats_text += f"  Сотрудников: {row[1]}\n"
-            stats_text += f"  Средняя зарплата: {row[2]:.2f} руб.\n"
-            stats_text += "-"*30 + "\n"
+        stats_text = io.StringIO()
+        department_stats_report(result).write(stats_text)
             
-        self.stats_text.setText(stats_text)
+        self.ensure_tab(self.tab2)
+        self.stats_text.setText(stats_text.getvalue())
         self.tab_widget.setCurrentIndex(1)  # Переключиться на вкладку статистики
         self.status_bar.showMessage(f"Запрос 2 выполнен. Отделов: {len(result)}")
         
     def on_query3_finished(self, result):
         """Обработка результата запроса 3"""
-        report_text = "Сотрудники с зарплатой выше средней:\n" + "="*50 + "\n"
-        for row in result:
-            report_text += f"{row[0]} - {row[1]} - {row[2]:.2f} руб.\n"
-            
-        self.reports_text.setText(report_text)
+        self.show_report(high_salary_report(result),
+                         (HIGH_SALARY_QUERY, [], ["Имя", "Должность", "Зарплата"]))
         self.tab_widget.setCurrentIndex(4)  # Переключиться на вкладку отчетов
         self.status_bar.showMessage(f"Запрос 3 выполнен. Найдено: {len(result)}")
         
+    def show_report(self, report, view=None):
+        """Показать отчет на вкладке отчетов с первой страницы
+
+        view - (SQL, параметры, заголовки) для экспорта отчета; без него
+        экспорт на вкладке недоступен, чтобы не выгрузить прежний отчет.
+        """
+        self.ensure_tab(self.tab5)
+        if view is None:
+            self.view_queries.pop(self.tab5, None)
+        else:
+            self.view_queries[self.tab5] = view
+        self.report = report
+        self.show_report_page(0)
+        
+    def show_report_page(self, page):
+        """Показать страницу детальной части текущего отчета"""
+        pages = self.report.page_count()
+        self.report_page = max(0, min(page, pages - 1))
+        self.reports_text.setPlainText(self.report.render(self.report_page))
+        self.report_page_label.setText(f"Страница {self.report_page + 1} из {pages}")
+        self.report_prev_btn.setEnabled(self.report_page > 0)
+        self.report_next_btn.setEnabled(self.report_page < pages - 1)
+        
     def on_query_error(self, error_msg):
         """Обработка ошибок запросов"""
         QMessageBox.critical(self, "Ошибка базы данных", f"Произошла ошибка:\n{error_msg}")
         self.status_bar.showMessage("Ошибка выполнения запроса")
         
-    def display_data_in_table(self, data):
+    def display_data_in_table(self, data, headers=EMPLOYEE_HEADERS, hidden=0):
         """Отображение данных в таблице"""
-        if not data:
-            self.table_widget.setRowCount(0)
-            return
-            
-        self.table_widget.setRowCount(len(data))
-        
-        for row_idx, row_data in enumerate(data):
-            for col_idx, cell_data in enumerate(row_data):
-                item = QTableWidgetItem(str(cell_data))
-                self.table_widget.setItem(row_idx, col_idx, item)
+        self.table_widget.setModel(self.table_model)
+        self.table_model.set_rows(data, headers, hidden)
                 
         # Настраиваем заголовки
         header = self.table_widget.horizontalHeader()
@@ -615,126 +3525,250 @@ class MainWindow(QMainWindow):
                 
         self.tab_widget.setCurrentIndex(0)  # Переключиться на вкладку с таблицей
         
+    def start_paged_browse(self, start_id=None):
+        """Постраничный просмотр таблицы employees (keyset-пагинация по id)"""
+        column = self.combo_columns.currentText()
+        field = COLUMN_FIELDS.get(column)
+        
+        self.cancel_stream(self.table_stream)
+        self.table_stream = None
+        self.paged_model.page_size = self.page_size_spin.value()
+        headers, hidden = ([column], 1) if field else (EMPLOYEE_HEADERS, 0)
+        (self.paged_model.sort_field, self.paged_model.sort_column,
+         self.paged_model.descending) = self.view_sort(self.tab1, headers, hidden)
+        self.table_widget.setModel(self.paged_model)
+        if field:
+            self.paged_model.start(f"id, {field}", headers, show_key=False, start_id=start_id)
+        else:
+            self.paged_model.start("*", headers, start_id=start_id)
+        self.show_sort_indicator(self.tab1, self.table_widget)
+        
+        # Для экспорта - весь просматриваемый диапазон; при переходе к id он
+        # задается ключом начальной строки после загрузки первой страницы
+        self.browse_export = (field or "*", headers)
+        self.update_browse_export()
+        self.tab_widget.setCurrentIndex(0)  # Переключиться на вкладку с таблицей
+        
+    def update_browse_export(self):
+        """Запрос экспорта постраничного просмотра от начальной строки"""
+        model = self.paged_model
+        if self.table_widget.model() is not model:
+            return
+        select_list, headers = self.browse_export
+        if model.start_id is not None and model.start_key is None:
+            # Первая страница не загружена или строки с id >= start_id нет
+            query, params = f"SELECT {select_list} FROM employees WHERE 0", []
+        else:
+            query, params = employee_range_query(select_list, model.sort_field,
+                                                 model.descending, model.start_key)
+        self.view_queries[self.tab1] = (query, params, headers)
+        
+    def load_employee_page(self, after_key, limit, on_page, on_error):
+        """Загрузка одной страницы для PagedEmployeeModel"""
+        model = self.paged_model
+        field, descending = model.sort_field, model.descending
+        if after_key is None and model.start_id is not None:
+            select_list, start_id = model.select_list, model.start_id
+            query = lambda conn: employee_start_page(conn, select_list, field, descending,
+                                                     start_id, limit)
+            params = []
+        else:
+            query, params = employee_page_query(model.select_list, field, descending, after_key)
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        self.status_bar.showMessage("Загрузка страницы...")
+        # Первая страница - начало просмотра, следующие - прокрутка таблицы
+        source = 'start_paged_browse' if after_key is None else 'fetch_page'
+        worker = self.create_worker(query, params, source=source)
+        worker.finished.connect(on_page)
+        worker.finished.connect(self.on_page_loaded)
+        worker.error.connect(on_error)
+        worker.error.connect(self.on_query_error)
+        worker.start()
+        
+    def on_page_loaded(self, rows):
+        """Обновление статуса и запроса экспорта после загрузки страницы"""
+        if self.paged_model.start_id is not None:
+            self.update_browse_export()
+        self.status_bar.showMessage(f"Загружено записей: {self.paged_model.rowCount()} "
+                                    f"(страница: {self.paged_model.page_size})")
+        
+    def on_page_size_changed(self, value):
+        """Изменение размера страницы для следующих подгрузок"""
+        self.paged_model.page_size = value
+        
+    def jump_to_id(self):
+        """Переход к указанному id в постраничном режиме"""
+        self.paged_check.setChecked(True)
+        self.start_paged_browse(start_id=self.jump_id_spin.value())
+        
+    def enable_server_sort(self, tab, view, reload):
+        """Сортировка по щелчку на заголовке: запрос вкладки выполняется заново с ORDER BY"""
+        header = view.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(
+            lambda section, order: self.on_sort_changed(tab, view, reload, section, order))
+        
+    def on_sort_changed(self, tab, view, reload, section, order):
+        """Щелчок на заголовке таблицы: запомнить сортировку вкладки и обновить данные"""
+        headers = view.model().headers
+        label = headers[section] if 0 <= section < len(headers) else None
+        if label not in SORT_FIELDS:
+            # По этой колонке не сортируем - вернуть прежний индикатор
+            self.show_sort_indicator(tab, view)
+            return
+        self.sort_state[tab] = (label, order == Qt.DescendingOrder)
+        self.status_bar.showMessage(f"Сортировка: {label}, "
+                                    f"{'по убыванию' if order == Qt.DescendingOrder else 'по возрастанию'}")
+        reload()
+        
+    def view_sort(self, tab, headers, hidden=0):
+        """Сортировка вкладки для таблицы с заголовками headers
+
+        Возвращает (поле SQL, колонка хранения в модели, по убыванию). Если
+        колонки сортировки в таблице нет, используется порядок по id.
+        """
+        label, descending = self.sort_state.get(tab, ("ID", False))
+        if label in headers:
+            return SORT_FIELDS[label], hidden + headers.index(label), descending
+        if label == "ID":
+            return "id", 0, descending
+        return "id", 0, False
+        
+    def show_sort_indicator(self, tab, view):
+        """Показать в заголовке сохраненную сортировку вкладки"""
+        label, descending = self.sort_state.get(tab, ("ID", False))
+        headers = view.model().headers
+        header = view.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(headers.index(label) if label in headers else -1,
+                                Qt.DescendingOrder if descending else Qt.AscendingOrder)
+        header.blockSignals(False)
+        
     def on_column_changed(self, column):
         """Обработка изменения выбора колонки"""
         self.status_bar.showMessage(f"Выбрана колонка: {column}")
         
     def apply_filters(self):
         """Применение фильтров"""
+        self.filter_timer.stop()
         self.status_bar.showMessage("Применение фильтров...")
         
         name_filter = self.name_filter.toPlainText().strip()
         dept_filter = self.dept_filter.toPlainText().strip()
         min_salary = self.min_salary.toPlainText().strip()
         
-        query = "SELECT * FROM employees WHERE 1=1"
-        params = []
-        
-        if name_filter:
-            query += " AND name LIKE ?"
-            params.append(f"%{name_filter}%")
-            
-        if dept_filter:
-            query += " AND department LIKE ?"
-            params.append(f"%{dept_filter}%")
-            
-        if min_salary:
-            try:
-                salary = float(min_salary)
-                query += " AND salary >= ?"
-                params.append(salary)
-            except ValueError:
-                pass
+        sort_field, self.filter_model.sort_column, self.filter_model.descending = \
+            self.view_sort(self.tab3, EMPLOYEE_HEADERS)
+        query, params = build_filter_query(name_filter, dept_filter, min_salary, self.fts_mode,
+                                           sort_field, self.filter_model.descending)
                 
-        self.worker = self.create_worker(query, params)
-        self.worker.finished.connect(self.on_filter_finished)
-        self.worker.error.connect(self.on_query_error)
+        self.filter_model.clear()
+        self.show_sort_indicator(self.tab3, self.filter_table)
+        self.view_queries[self.tab3] = (query, params, EMPLOYEE_HEADERS)
+        
+        # Предыдущий запрос фильтрации больше не нужен
+        self.cancel_stream(self.filter_stream)
+        
+        self.worker = self.create_worker(query, params, chunk_size=STREAM_CHUNK_SIZE,
+                                         source='apply_filters')
+        self.filter_stream = self.worker
+        self.worker.chunk.connect(self.on_filter_chunk)
+        self.worker.done.connect(self.on_filter_finished)
+        self.worker.error.connect(self.on_filter_error)
         self.worker.start()
         
-    def on_filter_finished(self, result):
-        """Обработка результата фильтрации"""
-        self.filter_table.setRowCount(len(result))
+    def on_filter_chunk(self, rows):
+        """Обработка очередной порции результата фильтрации"""
+        if not self.is_current_stream(self.filter_stream):
+            return
+        self.filter_model.append_rows(rows)
+        self.status_bar.showMessage(f"Применение фильтров... Получено записей: {self.filter_model.rowCount()}")
         
-        for row_idx, row_data in enumerate(result):
-            for col_idx, cell_data in enumerate(row_data):
-                item = QTableWidgetItem(str(cell_data))
-                self.filter_table.setItem(row_idx, col_idx, item)
-                
-        self.status_bar.showMessage(f"Фильтр применен. Найдено записей: {len(result)}")
+    def on_filter_finished(self, total):
+        """Обработка завершения фильтрации"""
+        if not self.is_current_stream(self.filter_stream):
+            return
+        self.filter_stream = None
+        self.status_bar.showMessage(f"Фильтр применен. Найдено записей: {total}")
+        
+    def on_filter_error(self, error_msg):
+        """Ошибка фильтрации (ошибки отмененных запросов не показываются)"""
+        if not self.is_current_stream(self.filter_stream):
+            return
+        self.filter_stream = None
+        self.on_query_error(error_msg)
         
     def generate_department_report(self):
         """Генерация отчета по отделам"""
-        query = """
-        SELECT department, 
-               COUNT(*) as total_employees,
-               MIN(salary) as min_salary,
-               MAX(salary) as max_salary,
-               AVG(salary) as avg_salary
-        FROM employees 
-        GROUP BY department
-        ORDER BY avg_salary DESC
-        """
-        
-        self.worker = self.create_worker(query)
+        if self.snapshot is not None:
+            self.on_department_report_finished(self.snapshot.department_report_rows())
+            return
+        self.worker = self.create_worker(DEPARTMENT_REPORT_QUERY, cacheable=True,
+                                         source='generate_department_report')
         self.worker.finished.connect(self.on_department_report_finished)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
     def on_department_report_finished(self, result):
         """Обработка отчета по отделам"""
-        report = "ОТЧЕТ ПО ОТДЕЛАМ\n" + "="*60 + "\n\n"
-        
-        for row in result:
-            report += f"ОТДЕЛ: {row[0]}\n"
-            report += f"  Всего сотрудников: {row[1]}\n"
-            report += f"  Минимальная зарплата: {row[2]:.2f} руб.\n"
-            report += f"  Максимальная зарплата: {row[3]:.2f} руб.\n"
-            report += f"  Средняя зарплата: {row[4]:.2f} руб.\n"
-            report += "-"*40 + "\n"
-            
-        self.reports_text.setText(report)
+        self.show_report(department_report(result),
+                         (DEPARTMENT_REPORT_QUERY, [],
+                          ["Отдел", "Сотрудников", "Мин. зарплата",
+                           "Макс. зарплата", "Средняя зарплата"]))
         self.status_bar.showMessage("Отчет по отделам сгенерирован")
         
     def generate_salary_report(self):
         """Генерация отчета по зарплатам"""
-        query = """
-        SELECT name, position, department, salary,
-               CASE 
-                   WHEN salary < 70000 THEN 'Низкая'
-                   WHEN salary < 85000 THEN 'Средняя'
-                   ELSE 'Высокая'
-               END as salary_category
-        FROM employees 
-        ORDER BY salary DESC
-        """
-        
-        self.worker = self.create_worker(query)
+        self.worker = self.create_worker(SALARY_REPORT_QUERY, source='generate_salary_report')
         self.worker.finished.connect(self.on_salary_report_finished)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
     def on_salary_report_finished(self, result):
         """Обработка отчета по зарплатам"""
-        report = "ОТЧЕТ ПО ЗАРПЛАТАМ\n" + "="*60 + "\n\n"
-        
-        high_count = sum(1 for row in result if row[4] == 'Высокая')
-        medium_count = sum(1 for row in result if row[4] == 'Средняя')
-        low_count = sum(1 for row in result if row[4] == 'Низкая')
-        
-        report += f"Распределение по категориям:\n"
-        report += f"  Высокая зарплата: {high_count} сотрудников\n"
-        report += f"  Средняя зарплата: {medium_count} сотрудников\n"
-        report += f"  Низкая зарплата: {low_count} сотрудников\n"
-        report += "\n" + "="*60 + "\n\n"
-        report += "Детальная информация:\n"
-        report += "-"*60 + "\n"
-        
-        for row in result:
-            report += f"{row[0]} ({row[1]}) - {row[2]} - {row[3]:.2f} руб. [{row[4]}]\n"
-            
-        self.reports_text.setText(report)
+        self.show_report(salary_report(result),
+                         (SALARY_REPORT_QUERY, [],
+                          ["Имя", "Должность", "Отдел", "Зарплата", "Категория"]))
         self.status_bar.showMessage("Отчет по зарплатам сгенерирован")
         
+    def generate_distribution_report(self):
+        """Генерация отчета о распределении зарплат"""
+        self.status_bar.showMessage("Расчет распределения зарплат...")
+        self.request_salary_distribution(self.on_distribution_report_ready,
+                                         'generate_distribution_report')
+        
+    def request_salary_distribution(self, handler, source):
+        """Распределение зарплат по снимку в памяти или запросами к базе"""
+        bins = self.bins_spin.value()
+        if self.snapshot is not None:
+            handler(self.snapshot.salary_distribution(bins))
+            return
+        self.worker = self.create_worker(lambda conn: [salary_distribution(conn, bins)],
+                                         source=source)
+        self.worker.finished.connect(lambda result: handler(result[0]))
+        self.worker.error.connect(self.on_query_error)
+        self.worker.start()
+        
+    def on_distribution_report_ready(self, distribution):
+        """Обработка отчета о распределении зарплат"""
+        if not distribution['total']:
+            self.show_report(distribution_report(distribution))
+            return
+        self.show_report(distribution_report(distribution),
+                         (SALARY_HISTOGRAM_QUERY,
+                          [distribution['low'], distribution['width'], len(distribution['bins']) - 1],
+                          ["Интервал", "Количество"]))
+        if self.is_tab_built(self.tab4) and MATPLOTLIB_AVAILABLE:
+            # Гистограмма рисуется в фоне и сразу попадает в кэш графиков
+            # (если вкладка графиков уже открывалась и matplotlib загружен)
+            self.render_chart(self.chart_key('histogram', len(distribution['bins'])),
+                              draw_salary_histogram, distribution)
+        self.status_bar.showMessage("Отчет о распределении зарплат сгенерирован")
+        
     def refresh_data(self):
         """Обновление всех данных"""
         self.status_bar.showMessage("Обновление данных...")
@@ -751,149 +3785,197 @@ class MainWindow(QMainWindow):
                          "- SQLite\n"
                          "- Многопоточность")
 
-    # Функции для графиков
-    def show_salary_chart(self):
-        """Показать график зарплат по отделам"""
-        if not MATPLOTLIB_AVAILABLE:
-            return
-            
-        self.status_bar.showMessage("Создание графика зарплат...")
-        
-        query = """
-        SELECT department, AVG(salary) as avg_salary, COUNT(*) as count
-        FROM employees 
-        GROUP BY department
-        ORDER BY avg_salary DESC
-        """
-        
-        self.worker = self.create_worker(query)
-        self.worker.finished.connect(self.on_salary_chart_data_ready)
+    def show_pool_stats(self):
+        """Показать статистику пула подключений"""
+        stats = self.db_pool.stats()
+        writer_stats = self.db_writer.stats()
+        QMessageBox.information(self, "Пул подключений",
+                                f"Размер пула: {stats['size']}\n"
+                                f"Открыто подключений: {stats['connections']}\n"
+                                f"Активных потоков: {stats['active']}\n"
+                                f"В очереди: {stats['pending']}\n"
+                                f"Выполнено запросов: {stats['completed']}\n"
+                                f"Ошибок: {stats['failed']}\n"
+                                f"Среднее время запроса: {stats['avg_ms']:.2f} мс\n\n"
+                                f"Операций записи: {writer_stats['operations']}\n"
+                                f"Транзакций записи: {writer_stats['transactions']}\n"
+                                f"Ошибок записи: {writer_stats['failed']}\n"
+                                f"В очереди записи: {writer_stats['queued']}")
+
+    def rebuild_department_stats(self):
+        """Пересчет таблицы department_stats (если агрегаты разошлись с данными)"""
+        self.status_bar.showMessage("Пересчет статистики отделов...")
+        self.worker = self.create_worker(rebuild_department_stats, is_write_operation=True,
+                                         source='rebuild_department_stats')
+        self.worker.finished.connect(self.on_department_stats_rebuilt)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
-    def on_salary_chart_data_ready(self, data):
-        """Обработка данных для графика зарплат"""
-        if not data:
-            return
-            
-        departments = [row[0] for row in data]
-        avg_salaries = [row[1] for row in data]
-        
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
+    def on_department_stats_rebuilt(self, result):
+        """Обработка пересчета статистики отделов"""
+        self.status_bar.showMessage(f"Статистика отделов пересчитана. Отделов: {result[0]}")
         
-        bars = ax.bar(departments, avg_salaries, color='skyblue', alpha=0.7)
-        ax.set_xlabel('Отдел')
-        ax.set_ylabel('Средняя зарплата (руб.)')
-        ax.set_title('Средняя зарплата по отделам')
-        
-        # Добавляем значения на столбцы
-        for bar, salary in zip(bars, avg_salaries):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1000,
-                   f'{salary:.0f}', ha='center', va='bottom')
+    def show_query_plans(self):
+        """Показать планы выполнения основных запросов"""
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            version = DatabaseManager.schema_version(conn)
+            conn.close()
+            plans = DatabaseManager.check_query_plans(DB_PATH)
+        except Exception as e:
+            self.on_query_error(str(e))
+            return
         
-        # Поворачиваем подписи отделов для лучшей читаемости
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        report = f"ПЛАНЫ ЗАПРОСОВ (версия схемы: {version})\n" + "="*60 + "\n\n"
+        for title, details in plans:
+            report += f"{title}:\n"
+            for detail in details:
+                report += f"  {detail}\n"
+            report += "-"*40 + "\n"
         
-        self.figure.tight_layout()
-        self.canvas.draw()
+        self.show_report(PagedReport(report))
+        self.tab_widget.setCurrentIndex(4)  # Переключиться на вкладку отчетов
+        self.status_bar.showMessage("Планы запросов получены")
+
+    def show_query_log(self):
+        """Показать журнал замеров запросов"""
+        if self.query_log_dialog is None:
+            self.query_log_dialog = QueryLogDialog(self.query_log, self)
+        self.query_log_dialog.refresh()
+        self.query_log_dialog.show()
+        self.query_log_dialog.raise_()
+
+    # Функции для графиков
+    def chart_key(self, kind, *extra):
+        """Ключ кэша изображений: тип графика, поколение данных, размер и параметры"""
+        self.ensure_tab(self.tab4)
+        if not self.chart_label.isVisible():
+            # Скрытая вкладка не следит за размером окна - подгоняем ее по текущей
+            self.tab4.resize(self.tab_widget.currentWidget().size())
+            self.tab4.layout().activate()
+        size = self.chart_label.size()
+        return (kind, self.query_cache.generation, size.width(), size.height()) + extra
+        
+    def check_data_version(self, callback, source):
+        """Сверить data_version на подключении пула и затем вызвать callback()
+
+        Кэш изображений графиков привязан к поколению кэша запросов, а запись
+        внешнего подключения меняет поколение только при такой проверке.
+        """
+        def check_data_version(conn):
+            self.query_cache.check_data_version(conn)
+            return []
         
-        self.tab_widget.setCurrentIndex(3)  # Переключиться на вкладку графиков
-        self.status_bar.showMessage("График зарплат построен")
+        self.worker = self.create_worker(check_data_version, source=source)
+        self.worker.finished.connect(lambda result: callback())
+        self.worker.error.connect(self.on_query_error)
+        self.worker.start()
         
-    def show_department_pie_chart(self):
-        """Показать круговую диаграмму распределения по отделам"""
+    def request_chart(self, kind, query, snapshot_method, draw, progress_message, done_message,
+                      source):
+        """Показать график из кэша или получить данные и отрисовать его в фоне"""
         if not MATPLOTLIB_AVAILABLE:
             return
+        self.check_data_version(lambda: self.show_chart(kind, query, snapshot_method, draw,
+                                                        progress_message, done_message, source),
+                                source)
+        
+    def show_chart(self, kind, query, snapshot_method, draw, progress_message, done_message,
+                   source):
+        """Продолжение request_chart после проверки data_version"""
+        key = self.chart_key(kind)
+        if self.show_cached_chart(key, done_message):
+            return
             
-        self.status_bar.showMessage("Создание диаграммы распределения...")
-        
-        query = """
-        SELECT department, COUNT(*) as count
-        FROM employees 
-        GROUP BY department
-        ORDER BY count DESC
-        """
-        
-        self.worker = self.create_worker(query)
-        self.worker.finished.connect(self.on_pie_chart_data_ready)
+        self.status_bar.showMessage(progress_message)
+        if self.snapshot is not None:
+            self.render_chart(key, draw, getattr(self.snapshot, snapshot_method)(), done_message)
+            return
+        self.worker = self.create_worker(query, cacheable=True, source=source)
+        self.worker.finished.connect(lambda data: self.render_chart(key, draw, data, done_message))
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
-    def on_pie_chart_data_ready(self, data):
-        """Обработка данных для круговой диаграммы"""
+    def show_cached_chart(self, key, done_message=None):
+        """Показать готовое изображение графика, если оно есть в кэше"""
+        image = self.chart_images.get(key)
+        if image is None:
+            return False
+        self.chart_images.move_to_end(key)
+        self.chart_request = key
+        self.display_chart(image, done_message)
+        return True
+        
+    def render_chart(self, key, draw, data, done_message=None):
+        """Отрисовка графика в фоновом потоке (Agg), результат - изображение"""
         if not data:
             return
+        self.chart_request = key
+        ratio = self.chart_label.devicePixelRatioF()
+        job = ChartRenderJob(draw, data, key[2], key[3], ratio)
+        job.signals.finished.connect(lambda image: self.on_chart_rendered(job, key, image, done_message))
+        job.signals.error.connect(lambda error_msg: self.on_chart_error(job, error_msg))
+        self.chart_jobs.add(job)
+        self.chart_pool.start(job)
+        
+    def on_chart_rendered(self, job, key, image, done_message):
+        """Изображение графика готово: в кэш и на экран, если оно еще нужно"""
+        self.chart_jobs.discard(job)
+        job.signals.deleteLater()
+        self.chart_images[key] = image
+        while len(self.chart_images) > CHART_CACHE_SIZE:
+            self.chart_images.popitem(last=False)
+        if key == self.chart_request:
+            self.display_chart(image, done_message)
             
-        departments = [row[0] for row in data]
-        counts = [row[1] for row in data]
+    def on_chart_error(self, job, error_msg):
+        """Ошибка отрисовки графика"""
+        self.chart_jobs.discard(job)
+        job.signals.deleteLater()
+        self.on_query_error(error_msg)
+        
+    def display_chart(self, image, done_message=None):
+        """Вывод изображения графика; done_message - переход на вкладку графиков"""
+        self.chart_label.setPixmap(QPixmap.fromImage(image))
+        if done_message:
+            self.tab_widget.setCurrentIndex(3)  # Переключиться на вкладку графиков
+            self.status_bar.showMessage(done_message)
         
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        colors = plt.cm.Set3(range(len(departments)))
-        wedges, texts, autotexts = ax.pie(counts, labels=departments, autopct='%1.1f%%',
-                                          colors=colors, startangle=90)
-        
-        ax.set_title('Распределение сотрудников по отделам')
-        
-        # Улучшаем читаемость текста
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def show_salary_chart(self):
+        """Показать график зарплат по отделам"""
+        self.request_chart('salary', SALARY_CHART_QUERY, 'salary_chart_rows', draw_salary_chart,
+                           "Создание графика зарплат...", "График зарплат построен", 'show_salary_chart')
         
-        self.tab_widget.setCurrentIndex(3)  # Переключиться на вкладку графиков
-        self.status_bar.showMessage("Диаграмма распределения построена")
+    def show_department_pie_chart(self):
+        """Показать круговую диаграмму распределения по отделам"""
+        self.request_chart('pie', PIE_CHART_QUERY, 'pie_chart_rows', draw_pie_chart,
+                           "Создание диаграммы распределения...", "Диаграмма распределения построена",
+                           'show_department_pie_chart')
         
     def show_hire_chart(self):
         """Показать график динамики найма"""
+        self.request_chart('hire', HIRE_CHART_QUERY, 'hire_chart_rows', draw_hire_chart,
+                           "Создание графика динамики найма...", "График динамики найма построен",
+                           'show_hire_chart')
+        
+    def show_salary_histogram(self):
+        """Показать гистограмму зарплат"""
         if not MATPLOTLIB_AVAILABLE:
             return
-            
-        self.status_bar.showMessage("Создание графика динамики найма...")
-        
-        query = """
-        SELECT hire_date, COUNT(*) as count
-        FROM employees 
-        GROUP BY hire_date
-        ORDER BY hire_date
-        """
-        
-        self.worker = self.create_worker(query)
-        self.worker.finished.connect(self.on_hire_chart_data_ready)
-        self.worker.error.connect(self.on_query_error)
-        self.worker.start()
-        
-    def on_hire_chart_data_ready(self, data):
-        """Обработка данных для графика динамики найма"""
-        if not data:
+        self.check_data_version(self.show_histogram_chart, 'show_salary_histogram')
+        
+    def show_histogram_chart(self):
+        """Продолжение show_salary_histogram после проверки data_version"""
+        # Число интервалов задается на вкладке отчетов
+        self.ensure_tab(self.tab5)
+        key = self.chart_key('histogram', self.bins_spin.value())
+        if self.show_cached_chart(key, "Гистограмма зарплат построена"):
             return
             
-        dates = [row[0] for row in data]
-        counts = [row[1] for row in data]
-        
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        ax.plot(dates, counts, marker='o', linewidth=2, markersize=8, color='green')
-        ax.set_xlabel('Дата найма')
-        ax.set_ylabel('Количество сотрудников')
-        ax.set_title('Динамика найма сотрудников')
-        
-        # Поворачиваем подписи дат
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-        
-        # Добавляем сетку
-        ax.grid(True, alpha=0.3)
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
-        
-        self.tab_widget.setCurrentIndex(3)  # Переключиться на вкладку графиков
-        self.status_bar.showMessage("График динамики найма построен")
+        self.status_bar.showMessage("Создание гистограммы зарплат...")
+        self.request_salary_distribution(lambda distribution: self.render_chart(
+            key, draw_salary_histogram, distribution if distribution['total'] else None,
+            "Гистограмма зарплат построена"), 'show_salary_histogram')
 
     # Функции для редактирования
     def add_employee(self):
@@ -915,27 +3997,243 @@ class MainWindow(QMainWindow):
             return
             
         self.status_bar.showMessage("Добавление сотрудника...")
+        values = [name, position, department, salary_val, hire_date]
         
-        query = """
-        INSERT INTO employees (name, position, department, salary, hire_date)
-        VALUES (?, ?, ?, ?, ?)
-        """
+        def insert_employee(conn):
+            # Добавленная строка читается в той же транзакции - в таблицы
+            # попадают значения в том виде, в каком они сохранены в базе
+            cursor = conn.execute(INSERT_EMPLOYEE_SQL, values)
+            return conn.execute("SELECT * FROM employees WHERE id = ?", [cursor.lastrowid]).fetchall()
         
-        self.worker = self.create_worker(query, [name, position, department, salary_val, hire_date], is_write_operation=True)
+        self.worker = self.create_worker(insert_employee, is_write_operation=True,
+                                         source='add_employee')
         self.worker.finished.connect(self.on_employee_added)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
     def on_employee_added(self, result):
-        """Обработка добавления сотрудника"""
-        if result and result[0] > 0:
+        """Обработка добавления сотрудника: строка дописывается в открытые таблицы"""
+        if result:
             QMessageBox.information(self, "Успех", "Сотрудник успешно добавлен!")
             self.clear_edit_form()
-            self.refresh_edit_table()
-            self.refresh_data()  # Обновляем основную таблицу
-            self.status_bar.showMessage("Сотрудник добавлен")
+            self.apply_inserted_row(result[0])
+            self.status_bar.showMessage(f"Сотрудник добавлен (ID {result[0][0]})")
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось добавить сотрудника")
+            
+    def apply_inserted_row(self, row):
+        """Вставить новую строку employees в загруженные таблицы без перезагрузки
+
+        Позиция строки определяется текущей сортировкой таблицы. Таблица
+        вкладки 1 не меняется, пока идет потоковый запрос; в постраничном
+        режиме строка за пределами загруженного диапазона придет со страницами.
+        Результат фильтра не меняется - строка может не подходить под условия.
+        """
+        self.edit_model.insert_row(self.edit_model.sorted_position(row), row)
+        self.update_snapshot(lambda snapshot: snapshot.append_rows([row[:1] + row[2:]]))
+        
+        model = self.table_widget.model()
+        if self.tab1 not in self.view_queries or self.table_stream is not None:
+            return
+        values = model.employee_row(row)
+        position = model.sorted_position(values)
+        if model is self.paged_model:
+            if position == 0 and model.start_id is not None:
+                return  # раньше строки, с которой начат просмотр
+            if position == model.row_total:
+                if not model.exhausted or model.loading:
+                    return
+                model.last_key = model.row_key(values)
+        model.insert_row(position, values)
+        
+    def apply_deleted_ids(self, employee_ids):
+        """Убрать удаленных сотрудников из всех загруженных таблиц"""
+        models = [self.edit_model, self.table_model, self.paged_model]
+        if self.is_tab_built(self.tab3):
+            models.append(self.filter_model)
+        for model in models:
+            model.remove_keys(employee_ids)
+        self.update_snapshot(lambda snapshot: snapshot.remove_ids(employee_ids))
+        
+    def toggle_snapshot(self, enabled):
+        """Включение и выключение аналитики по снимку в памяти"""
+        if enabled:
+            if not load_numpy():
+                self.snapshot_action.setChecked(False)
+                return
+            self.load_snapshot()
+        else:
+            if self.snapshot_job is not None:
+                self.snapshot_job.cancel()
+            self.snapshot = None
+            self.status_bar.showMessage("Аналитика в памяти выключена, отчеты и графики строятся запросами")
+        
+    def load_snapshot(self):
+        """Построение снимка employees в фоновой задаче"""
+        if self.snapshot_job is not None:
+            # Снимок уже строится - после загрузки его нужно построить заново
+            self.snapshot_stale = True
+            return
+        
+        def job(conn, progress, should_stop):
+            started = time.perf_counter()
+            snapshot = EmployeeSnapshot.load(conn, should_stop=should_stop)
+            return {'snapshot': snapshot, 'seconds': time.perf_counter() - started}
+        
+        self.snapshot_stale = False
+        self.snapshot_job = PoolJob(job, self.db_pool)
+        self.snapshot_job.signals.finished.connect(self.on_snapshot_loaded)
+        self.snapshot_job.signals.error.connect(self.on_snapshot_error)
+        self.status_bar.showMessage("Построение снимка данных в памяти...")
+        self.snapshot_job.start()
+        
+    def on_snapshot_loaded(self, result):
+        """Снимок построен"""
+        self.snapshot_job.signals.deleteLater()
+        self.snapshot_job = None
+        if not self.snapshot_action.isChecked():
+            return
+        if self.snapshot_stale:
+            # Во время загрузки данные изменились
+            self.load_snapshot()
+            return
+        self.snapshot = result['snapshot']
+        self.status_bar.showMessage(f"Снимок в памяти: {self.snapshot.size} записей, "
+                                    f"{self.snapshot.nbytes() / 1024 / 1024:.1f} МБ, "
+                                    f"{result['seconds']:.2f} с")
+        
+    def on_snapshot_error(self, error_msg):
+        """Ошибка построения снимка"""
+        self.snapshot_job.signals.deleteLater()
+        self.snapshot_job = None
+        if self.snapshot_action.isChecked():
+            self.snapshot_action.setChecked(False)
+            self.on_query_error(error_msg)
+        
+    def update_snapshot(self, change):
+        """Применить изменение к снимку или перестроить его, если он еще загружается"""
+        if self.snapshot_job is not None:
+            self.snapshot_stale = True
+        elif self.snapshot is not None:
+            change(self.snapshot)
+        
+    def import_csv(self):
+        """Импорт сотрудников из CSV файла в фоновой задаче"""
+        path, _ = QFileDialog.getOpenFileName(self, "Импорт сотрудников", "",
+                                              "CSV файлы (*.csv);;Все файлы (*)")
+        if not path:
+            return
+        
+        # Пакеты пишутся через поток записи (он же сбрасывает кэш), задача пула
+        # только читает файл и ждет фиксации очередного пакета
+        write_batch = lambda rows: self.db_writer.execute(insert_employees(rows))
+        job = lambda conn, progress, should_stop: import_employees_csv(
+            write_batch, path, progress=progress, should_stop=should_stop)
+        self.import_worker = PoolJob(job, self.db_pool)
+        self.import_worker.signals.progress.connect(self.on_import_progress)
+        self.import_worker.signals.finished.connect(self.on_import_finished)
+        self.import_worker.signals.error.connect(self.on_import_error)
+        
+        self.import_btn.setEnabled(False)
+        self.import_progress.setValue(0)
+        self.import_progress.show()
+        self.import_cancel_btn.show()
+        self.status_bar.showMessage(f"Импорт из {os.path.basename(path)}...")
+        self.import_worker.start()
+        
+    def cancel_import(self):
+        """Отмена импорта"""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+        
+    def on_import_progress(self, state):
+        """Отображение хода импорта"""
+        self.import_progress.setValue(state['percent'])
+        self.status_bar.showMessage(f"Импорт: добавлено {state['imported']}, отклонено {state['rejected']}")
+        
+    def finish_import(self):
+        """Возврат интерфейса импорта в исходное состояние"""
+        self.import_worker.signals.deleteLater()
+        self.import_worker = None
+        self.import_btn.setEnabled(True)
+        self.import_progress.hide()
+        self.import_cancel_btn.hide()
+        # Импорт меняет таблицу пакетами - снимок проще построить заново
+        if self.snapshot_action.isChecked():
+            self.load_snapshot()
+
+    def on_import_finished(self, stats):
+        """Обработка завершения импорта"""
+        self.finish_import()
+        
+        message = (f"Добавлено записей: {stats['imported']}\n"
+                   f"Отклонено записей: {stats['rejected']}\n"
+                   f"Время: {stats['seconds']:.1f} с ({stats['rows_per_sec']:.0f} строк/с)")
+        if stats['rejected_path']:
+            message += f"\n\nОтклоненные строки: {stats['rejected_path']}"
+        if stats['cancelled']:
+            message = "Импорт отменен.\n\n" + message
+        QMessageBox.information(self, "Импорт из CSV", message)
+        
+        self.refresh_edit_table()
+        self.refresh_data()  # Обновляем основную таблицу
+        self.status_bar.showMessage(f"Импорт завершен: {stats['imported']} записей, "
+                                    f"{stats['rows_per_sec']:.0f} строк/с")
+        
+    def on_import_error(self, error_msg):
+        """Обработка ошибки импорта"""
+        self.finish_import()
+        self.on_query_error(error_msg)
+        
+    def export_current_view(self):
+        """Экспорт данных текущей вкладки: запрос выполняется заново и пишется в файл потоком"""
+        if self.export_worker is not None:
+            QMessageBox.warning(self, "Экспорт", "Экспорт уже выполняется")
+            return
+        
+        view = self.view_queries.get(self.tab_widget.currentWidget())
+        if view is None:
+            QMessageBox.warning(self, "Экспорт", "На этой вкладке нет данных для экспорта.\n"
+                                "Сначала выполните запрос, фильтр или отчет.")
+            return
+        
+        filters = "CSV (*.csv);;JSON Lines (*.jsonl)"
+        if importlib.util.find_spec("pyarrow") is not None:
+            filters += ";;Parquet (*.parquet)"
+        path, selected = QFileDialog.getSaveFileName(self, "Экспорт", "", filters)
+        if not path:
+            return
+        if os.path.splitext(path)[1].lower() not in EXPORT_FORMATS:
+            path += "." + selected.split("*.")[1].rstrip(")")
+        
+        query, params, headers = view
+        job = lambda conn, progress, should_stop: export_query(
+            conn, query, params, headers, path, progress=progress, should_stop=should_stop)
+        self.export_worker = PoolJob(job, self.db_pool)
+        self.export_worker.signals.progress.connect(self.on_export_progress)
+        self.export_worker.signals.finished.connect(self.on_export_finished)
+        self.export_worker.signals.error.connect(self.on_export_error)
+        self.status_bar.showMessage(f"Экспорт в {os.path.basename(path)}...")
+        self.export_worker.start()
+        
+    def on_export_progress(self, state):
+        """Отображение хода экспорта"""
+        self.status_bar.showMessage(f"Экспорт: записано строк {state['rows']}, "
+                                    f"{state['bytes'] / 1024 / 1024:.1f} МБ")
+        
+    def on_export_finished(self, stats):
+        """Обработка завершения экспорта"""
+        self.export_worker.signals.deleteLater()
+        self.export_worker = None
+        self.status_bar.showMessage(f"Экспорт завершен: {stats['rows']} строк, "
+                                    f"{stats['bytes'] / 1024 / 1024:.1f} МБ, "
+                                    f"{stats['rows_per_sec']:.0f} строк/с -> {stats['path']}")
+        
+    def on_export_error(self, error_msg):
+        """Обработка ошибки экспорта"""
+        self.export_worker.signals.deleteLater()
+        self.export_worker = None
+        self.on_query_error(error_msg)
         
     def clear_edit_form(self):
         """Очистка формы редактирования"""
@@ -947,28 +4245,21 @@ class MainWindow(QMainWindow):
         
     def refresh_edit_table(self):
         """Обновление таблицы редактирования"""
-        query = "SELECT * FROM employees ORDER BY id"
+        sort_field, self.edit_model.sort_column, self.edit_model.descending = \
+            self.view_sort(self.tab6, self.edit_model.headers)
+        query = "SELECT * FROM employees" + order_by_clause(sort_field, self.edit_model.descending)
+        self.show_sort_indicator(self.tab6, self.edit_table)
         
-        self.worker = self.create_worker(query)
+        self.worker = self.create_worker(query, source='refresh_edit_table')
         self.worker.finished.connect(self.on_edit_table_data_ready)
         self.worker.error.connect(self.on_query_error)
         self.worker.start()
         
     def on_edit_table_data_ready(self, data):
         """Обработка данных для таблицы редактирования"""
-        self.edit_table.setRowCount(len(data))
-        
-        for row_idx, row_data in enumerate(data):
-            for col_idx, cell_data in enumerate(row_data):
-                if col_idx < 6:  # Первые 6 колонок - данные
-                    item = QTableWidgetItem(str(cell_data))
-                    self.edit_table.setItem(row_idx, col_idx, item)
-                    
-            # Добавляем кнопку удаления в последнюю колонку
-            delete_btn = QPushButton("🗑️ Удалить")
-            delete_btn.clicked.connect(lambda checked, id=row_data[0]: self.delete_employee(id))
-            self.edit_table.setCellWidget(row_idx, 6, delete_btn)
-            
+        # Первые 6 колонок - данные, последняя (без данных) - кнопка удаления,
+        # которую рисует delete_delegate
+        self.edit_model.set_rows(data)
         self.status_bar.showMessage("Таблица редактирования обновлена")
         
     def delete_employee(self, employee_id):
@@ -980,36 +4271,61 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             self.status_bar.showMessage(f"Удаление сотрудника с ID {employee_id}...")
             query = "DELETE FROM employees WHERE id = ?"
-            self.worker = self.create_worker(query, [employee_id], is_write_operation=True)
-            self.worker.finished.connect(self.on_employee_deleted)
+            self.worker = self.create_worker(query, [employee_id], is_write_operation=True,
+                                             source='delete_employee')
+            self.worker.finished.connect(lambda result: self.on_employee_deleted(result, employee_id))
             self.worker.error.connect(self.on_query_error)
             self.worker.start()
             
-    def on_employee_deleted(self, result):
-        """Обработка удаления сотрудника"""
+    def on_employee_deleted(self, result, employee_id):
+        """Обработка удаления сотрудника: строка убирается из таблиц без перезагрузки"""
         if result and result[0] > 0:
             QMessageBox.information(self, "Успех", "Сотрудник удален!")
-            self.refresh_edit_table()
-            self.refresh_data()  # Обновляем основную таблицу
+            self.apply_deleted_ids([employee_id])
             self.status_bar.showMessage("Сотрудник удален")
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось удалить сотрудника")
         
     def delete_selected_employee(self):
-        """Удаление выбранного сотрудника"""
-        current_row = self.edit_table.currentRow()
-        if current_row >= 0:
-            id_item = self.edit_table.item(current_row, 0)
-            if id_item:
-                employee_id = int(id_item.text())
-                self.delete_employee(employee_id)
-        else:
+        """Удаление выбранных сотрудников одной транзакцией"""
+        rows = [index.row() for index in self.edit_table.selectionModel().selectedRows()]
+        if not rows:
             QMessageBox.warning(self, "Предупреждение", "Выберите сотрудника для удаления!")
+            return
+        
+        employee_ids = [int(self.edit_model.value(row, 0)) for row in rows]
+        if len(employee_ids) == 1:
+            question = f'Вы уверены, что хотите удалить сотрудника с ID {employee_ids[0]}?'
+        else:
+            question = f'Вы уверены, что хотите удалить выбранных сотрудников ({len(employee_ids)})?'
+        reply = QMessageBox.question(self, 'Подтверждение', question,
+                                   QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.status_bar.showMessage(f"Удаление сотрудников: {len(employee_ids)}...")
+        
+        def delete_batch(conn):
+            cursor = conn.executemany("DELETE FROM employees WHERE id = ?",
+                                      [(employee_id,) for employee_id in employee_ids])
+            return [cursor.rowcount]
+        
+        self.worker = self.create_worker(delete_batch, is_write_operation=True,
+                                         source='delete_selected_employee')
+        self.worker.finished.connect(lambda result: self.on_employees_deleted(result, employee_ids))
+        self.worker.error.connect(self.on_query_error)
+        self.worker.start()
+        
+    def on_employees_deleted(self, result, employee_ids):
+        """Обработка пакетного удаления: строки убираются из таблицы без перезагрузки"""
+        self.edit_table.clearSelection()
+        self.apply_deleted_ids(employee_ids)
+        self.status_bar.showMessage(f"Удалено сотрудников: {result[0]}")
 
     def test_database_connection(self):
         """Тестовая функция для проверки подключения к БД"""
         try:
-            conn = sqlite3.connect('database.db')
+            conn = sqlite3.connect(DB_PATH)
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM employees")
             count = cursor.fetchone()[0]
@@ -1023,17 +4339,60 @@ class MainWindow(QMainWindow):
 
 def main():
     """Главная функция"""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="PyQt5 Database Application")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help="количество потоков и подключений к БД в пуле")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="вывести время до появления первого окна по этапам")
+    batch = parser.add_argument_group("пакетные отчеты без GUI")
+    batch.add_argument('--report', nargs='+', metavar='DB',
+                       help="сформировать отчеты по файлам баз и завершиться")
+    batch.add_argument('--report-dir', default='reports',
+                       help="каталог отчетов (по подкаталогу на базу)")
+    batch.add_argument('--reports', nargs='+', choices=list(BATCH_REPORTS), default=list(BATCH_REPORTS),
+                       help="какие отчеты формировать")
+    batch.add_argument('--jobs', type=int, default=None,
+                       help="число процессов (по умолчанию - по числу процессоров)")
+    batch.add_argument('--bins', type=int, default=DEFAULT_SALARY_BINS,
+                       help="интервалов гистограммы в отчете о распределении")
+    args, qt_args = parser.parse_known_args()
+    
+    if args.report:
+        sys.exit(run_batch_reports(args.report, args.report_dir, args.reports, args.jobs, args.bins))
+    
+    # Отметки этапов запуска: (этап, время от начала загрузки модуля)
+    marks = [("импорт модулей", time.perf_counter())]
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # Установка стиля приложения
     app.setStyle('Fusion')
+    marks.append(("QApplication", time.perf_counter()))
     
     # Создание и отображение главного окна
-    window = MainWindow()
+    window = MainWindow(pool_size=args.pool_size, profile=args.profile_startup)
+    marks.append(("главное окно", time.perf_counter()))
     window.show()
     
+    if args.profile_startup:
+        # Таймер срабатывает, когда цикл событий обработал показ и первую отрисовку окна
+        def report_startup():
+            marks.append(("первая отрисовка", time.perf_counter()))
+            print_startup_profile(marks)
+        QTimer.singleShot(0, report_startup)
+    
     sys.exit(app.exec_())
 
 
+def print_startup_profile(marks):
+    """Вывод длительности этапов запуска и времени до первого окна"""
+    print("Профиль запуска:")
+    previous = STARTED_AT
+    for stage, moment in marks:
+        print(f"  {stage:<20}{(moment - previous) * 1000:>9.1f} мс")
+        previous = moment
+    print(f"  {'до первого окна':<20}{(previous - STARTED_AT) * 1000:>9.1f} мс")
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file